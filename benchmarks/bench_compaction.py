@@ -0,0 +1,99 @@
+"""History store size and query latency before/after compaction.
+
+Usage:
+    python benchmarks/bench_compaction.py [--years 3] [--retention-days 90]
+
+Builds a throw-away history with a realistic day of intervals repeated
+over several years, then compacts everything older than the retention
+horizon the way the background Compactor does (chunks + incremental
+vacuum) and compares.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+    )
+
+from studyclock.export import export_rows  # noqa: E402
+from studyclock.history import HistoryStore, retention_horizon  # noqa: E402
+
+# one study day: 7 x (50 min focus + 1 min screen break + 10 min break)
+DAY = [("paused", 600)] + [
+    ("focus", 3000), ("microbreak", 60), ("break", 600)
+    ] * 7 + [("paused", 1800)]
+
+
+def build(store: HistoryStore, years: int):
+    t = time.time() - years * 365 * 86400
+    rows = []
+    for _ in range(years * 365):
+        start = t
+        for kind, sec in DAY:
+            rows.append((t, t + sec, kind, int(kind == "focus"), 7))
+            t += sec
+        t = start + 86400
+        if len(rows) > 10000:
+            store.append(rows)
+            rows.clear()
+    store.append(rows)
+
+
+def size(path: str) -> int:
+    return sum(
+        os.path.getsize(p) for p in (path, path + "-wal")
+        if os.path.exists(p)
+        )
+
+
+def measure(store: HistoryStore, label: str):
+    store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    timings = {}
+    for name, since, gran in (
+            ("last 30 days, daily", time.time() - 30 * 86400, "day"),
+            ("everything, monthly", None, "month"),
+            ):
+        t0 = time.perf_counter()
+        rows = list(export_rows(store, since, None, gran))
+        timings[name] = (time.perf_counter() - t0, rows)
+    raw = store.conn.execute("SELECT count(*) FROM intervals").fetchone()[0]
+
+    print(f"{label}:")
+    print(f"  file size:  {size(store.path) / 1024:.0f} KiB")
+    print(f"  raw rows:   {raw}")
+    for name, (sec, _) in timings.items():
+        print(f"  {name:<20} {sec * 1000:8.1f} ms")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--retention-days", type=int, default=90)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "history.sqlite3")
+    store = HistoryStore(path)
+    build(store, args.years)
+    before = measure(store, "before")
+
+    t0 = time.perf_counter()
+    horizon = retention_horizon(args.retention_days)
+    steps = 0
+    while store.compact_step(horizon):
+        steps += 1
+    while store.vacuum_step():
+        steps += 1
+    print(f"compaction: {time.perf_counter() - t0:.2f} s in {steps} steps")
+
+    after = measure(store, "after")
+    name = "everything, monthly"
+    print(f"monthly totals unchanged: {before[name][1] == after[name][1]}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""CPU time of one simulated hour of ticks, window visible vs hidden.
+
+Usage:
+    python benchmarks/bench_hidden_mode.py [--seconds 3600]
+
+Runs Qt offscreen and drives ``logic.on_tick`` directly, so only the
+per-tick work is measured. Settings go to a throw-away INI file and every
+data/runtime location (history, shared state) to a temporary directory, so
+the real clock's progress is never touched.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+SCRATCH = tempfile.mkdtemp(prefix="studyclock-bench-")
+# every root paths.py resolves from, on all platforms
+for var in (
+        "HOME", "USERPROFILE", "APPDATA", "XDG_CONFIG_HOME", "XDG_DATA_HOME",
+        "XDG_RUNTIME_DIR"
+        ):
+    os.environ[var] = SCRATCH
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+    )
+
+from PySide6.QtCore import QSettings  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from studyclock.window import StudyClockWindow  # noqa: E402
+
+
+def run_hour(app, w, seconds: int) -> float:
+    w.logic.reset_all()
+    w.logic.start()
+    app.processEvents()
+
+    t0 = time.process_time()
+    for _ in range(seconds):
+        w.logic.on_tick()
+        w.logic.on_pause_count_tick()
+        app.processEvents()
+    return time.process_time() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=int, default=3600)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    # an INI file instead of the registry / plist QSettings would use
+    w = StudyClockWindow(open_store=lambda: QSettings(
+        os.path.join(SCRATCH, "settings.ini"), QSettings.IniFormat
+        ))
+    w.tick_timer.timeout.disconnect()  # ticks are driven by hand
+
+    w.show()
+    app.processEvents()
+    visible = run_hour(app, w, args.seconds)
+
+    w.hide()
+    app.processEvents()
+    hidden = run_hour(app, w, args.seconds)
+    w.on_quit()  # no app.exec(), so stop the worker threads by hand
+
+    saved = visible - hidden
+    print(f"ticks:   {args.seconds}")
+    print(f"visible: {visible:.3f} s CPU")
+    print(f"hidden:  {hidden:.3f} s CPU")
+    print(
+        f"saved:   {saved:.3f} s CPU "
+        f"({(saved / visible * 100) if visible else 0:.0f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,7 @@
-__all__ = ["app", "window", "logic", "settings_dialog", "stats_dialog", "util"]
+__all__ = [
+    "app", "window", "logic", "settings_dialog", "stats_dialog", "util",
+    "aggregate", "audio", "cli", "export", "formatting", "headless", "history",
+    "instance", "metrics", "paths", "persistence", "profiles",
+    "shared_state",
+    ]
 __version__ = "1.0.0"
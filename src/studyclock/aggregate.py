@@ -0,0 +1,277 @@
+"""Group rollups from many users' exported histories.
+
+``python -m studyclock aggregate alice.csv bob.jsonl ... --store group.db``
+
+1. A process pool rolls every input file (raw or day export, CSV or JSON
+   Lines; week/month rollups can't be split into days and are rejected)
+   up into per-day rows for its user and spills them, sorted by
+   day, to a temporary file.
+2. The spill files are k-way merged by (day, user) with ``heapq.merge``,
+   so the parent streams one row per file at a time.
+3. Per-user and per-group daily rows go into an indexed SQLite store.
+
+Memory per worker is bounded by the number of days in one file, and the
+merge never holds more than one row per input.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import groupby
+
+from .export import efficiency, rollup, split_buckets
+from .history import KINDS, Interval
+
+SUMS = (*(f"{k}_sec" for k in KINDS), "units")
+
+SCHEMA = """
+DROP TABLE IF EXISTS user_daily;
+DROP TABLE IF EXISTS group_daily;
+CREATE TABLE user_daily (
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    focus_sec INTEGER, break_sec INTEGER, lunch_sec INTEGER,
+    microbreak_sec INTEGER, paused_sec INTEGER, running_sec INTEGER,
+    efficiency INTEGER, units INTEGER, goal INTEGER,
+    PRIMARY KEY (user, day)
+);
+CREATE INDEX user_daily_day ON user_daily(day);
+CREATE TABLE group_daily (
+    day TEXT PRIMARY KEY,
+    users INTEGER,
+    focus_sec INTEGER, break_sec INTEGER, lunch_sec INTEGER,
+    microbreak_sec INTEGER, paused_sec INTEGER, running_sec INTEGER,
+    efficiency INTEGER, units INTEGER, goal_units INTEGER
+);
+"""
+
+
+# ---------- Reading exports ----------
+def read_rows(path: str):
+    if path.endswith((".jsonl", ".json")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def raw_intervals(rows):
+    for row in rows:
+        yield Interval(
+            datetime.fromisoformat(row["start"]).timestamp(),
+            datetime.fromisoformat(row["end"]).timestamp(),
+            row["kind"], int(row["units"]), int(row["goal"]),
+            )
+
+
+def daily_rows(path: str):
+    """Per-day rows of one export, whether it's raw or already daily."""
+    rows = read_rows(path)
+    first = next(rows, None)
+    if first is None:
+        return iter(())
+    rows = _chain(first, rows)
+    if "period" in first:
+        if first.get("granularity") != "day":
+            raise ValueError(
+                f"{path}: not a raw or day export (got "
+                f"{first.get('granularity') or 'no granularity column'}); "
+                "re-export it with --granularity raw or day"
+                )
+        return rows
+    return rollup(split_buckets(raw_intervals(rows), "day"), "day")
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+# ---------- Worker ----------
+def rollup_file(job):
+    """Runs in a pool process: one export file -> sorted spill file."""
+    path, user, spill_dir = job
+    days = {}
+    for row in daily_rows(path):
+        day = days.setdefault(row["period"], dict.fromkeys(SUMS, 0))
+        for key in SUMS:
+            day[key] += int(row[key])
+        day["goal"] = max(day.get("goal", 0), int(row["goal"]))
+
+    fd, spill = tempfile.mkstemp(dir=spill_dir, suffix=".jsonl")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for period in sorted(days):
+            row = days[period]
+            row.update(user=user, day=period)
+            f.write(json.dumps(row) + "\n")
+    return spill
+
+
+def read_spill(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+# ---------- Merge ----------
+def finish(row: dict) -> dict:
+    running = sum(row[f"{k}_sec"] for k in KINDS if k != "paused")
+    row["running_sec"] = running
+    row["efficiency"] = efficiency(running, row["paused_sec"])
+    return row
+
+
+def merge_users(spills):
+    """k-way merge of per-user day streams; same (day, user) rows are
+    summed (one user may be split over several files)."""
+    merged = heapq.merge(
+        *(read_spill(p) for p in spills),
+        key=lambda r: (r["day"], r["user"])
+        )
+    for (day, user), rows in groupby(
+            merged, key=lambda r: (r["day"], r["user"])):
+        total = next(rows)
+        for row in rows:
+            for key in SUMS:
+                total[key] += row[key]
+            total["goal"] = max(total["goal"], row["goal"])
+        yield finish(total)
+
+
+def group_days(user_rows, on_user_row):
+    for day, rows in groupby(user_rows, key=lambda r: r["day"]):
+        group = dict.fromkeys(SUMS, 0)
+        group.update(day=day, users=0, goal_units=0)
+        for row in rows:
+            on_user_row(row)
+            group["users"] += 1
+            group["goal_units"] += row["goal"]
+            for key in SUMS:
+                group[key] += row[key]
+        yield finish(group)
+
+
+def user_name(path: str, user_from: str) -> str:
+    if user_from == "dir":
+        return os.path.basename(os.path.dirname(os.path.abspath(path)))
+    name = os.path.basename(path)
+    return name.split(".", 1)[0]
+
+
+def aggregate(paths, store: str, workers: int = None, user_from="stem",
+              batch: int = 5000) -> dict:
+    user_cols = (
+        "user", "day", *(f"{k}_sec" for k in KINDS), "running_sec",
+        "efficiency", "units", "goal",
+        )
+    group_cols = (
+        "day", "users", *(f"{k}_sec" for k in KINDS), "running_sec",
+        "efficiency", "units", "goal_units",
+        )
+    user_sql = (
+        f"INSERT INTO user_daily ({', '.join(user_cols)}) "
+        f"VALUES ({', '.join('?' * len(user_cols))})"
+        )
+    group_sql = (
+        f"INSERT INTO group_daily ({', '.join(group_cols)}) "
+        f"VALUES ({', '.join('?' * len(group_cols))})"
+        )
+
+    pending_users = []
+    pending_groups = []
+    totals = dict.fromkeys(SUMS, 0)
+    totals.update(goal_units=0, days=0)
+    users = set()
+
+    def on_user_row(row):
+        users.add(row["user"])
+        pending_users.append(tuple(row[c] for c in user_cols))
+        if len(pending_users) >= batch:
+            conn.executemany(user_sql, pending_users)
+            pending_users.clear()
+
+    with tempfile.TemporaryDirectory(prefix="studyclock-agg-") as spill_dir:
+        jobs = [(p, user_name(p, user_from), spill_dir) for p in paths]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            spills = list(pool.map(rollup_file, jobs, chunksize=1))
+
+        # only replace the store once every input has been read
+        conn = sqlite3.connect(store)
+        conn.executescript(SCHEMA)
+
+        with conn:
+            for group in group_days(merge_users(spills), on_user_row):
+                totals["days"] += 1
+                totals["goal_units"] += group["goal_units"]
+                for key in SUMS:
+                    totals[key] += group[key]
+                pending_groups.append(tuple(group[c] for c in group_cols))
+                if len(pending_groups) >= batch:
+                    conn.executemany(group_sql, pending_groups)
+                    pending_groups.clear()
+            conn.executemany(user_sql, pending_users)
+            conn.executemany(group_sql, pending_groups)
+    conn.close()
+
+    totals["users"] = len(users)
+    return finish(totals)
+
+
+# ---------- CLI ----------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="studyclock aggregate",
+        description="Merge many users' exported histories into group "
+                    "rollups.",
+        )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="export files (raw or day granularity, .csv or .jsonl)",
+        )
+    parser.add_argument(
+        "--store", default="studyclock-group.sqlite3",
+        help="SQLite file to (re)build (default: %(default)s)",
+        )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: one per CPU)",
+        )
+    parser.add_argument(
+        "--user-from", choices=("stem", "dir"), default="stem",
+        help="take the user name from the file name or its directory",
+        )
+    return parser
+
+
+def main(argv=None) -> int:
+    from .formatting import format_hm
+
+    args = build_parser().parse_args(argv)
+    try:
+        t = aggregate(args.inputs, args.store, args.workers, args.user_from)
+    except ValueError as e:
+        print(f"studyclock aggregate: {e}", file=sys.stderr)
+        return 2
+    goal = t["goal_units"]
+    print(f"Users: {t['users']}  Days: {t['days']}")
+    print(f"Focus Active: {format_hm(t['focus_sec'])}")
+    print(f"Paused: {format_hm(t['paused_sec'])}")
+    print(f"Screen Break: {format_hm(t['microbreak_sec'])}")
+    print(f"Efficiency: {t['efficiency']}%")
+    print(
+        f"Units: {t['units']}/{goal}"
+        + (f" ({int(round(t['units'] / goal * 100))}%)" if goal else "")
+        )
+    print(f"Written to {args.store}")
+    return 0
@@ -11,18 +11,47 @@ if __package__ is None or __package__ == "":
             os.path.join(os.path.dirname(__file__), "..")
             )
         )
+    from studyclock.instance import AlreadyRunning, InstanceServer, forward
+    from studyclock.metrics import MetricsExporter
     from studyclock.window import StudyClockWindow
 else:
     # Running as a package
+    from .instance import AlreadyRunning, InstanceServer, forward
+    from .metrics import MetricsExporter
     from .window import StudyClockWindow
 
 
-def main():
-    app = QApplication(sys.argv)
+def main(
+        argv=None, command=None, metrics_port=0, metrics_file="",
+        profile=None
+        ):
+    # claim the instance socket before touching any state
+    try:
+        server = InstanceServer()
+    except AlreadyRunning:
+        forward(command, profile)
+        sys.exit(0)
+    except OSError as e:
+        print(f"StudyClock: cannot open the instance socket: {e}",
+              file=sys.stderr)
+        sys.exit(1)
+
+    app = QApplication(sys.argv if argv is None else argv)
     app.setWindowIcon(QIcon("icon.png"))
-    w = StudyClockWindow()
+    exporter = MetricsExporter(metrics_port, metrics_file)
+    w = StudyClockWindow(profile=profile)
+
+    # later launches forward their command here instead of starting a
+    # second clock (handled on the GUI thread via the signal)
+    server.serve(w.command_received.emit)
+
     w.show()
-    sys.exit(app.exec())
+    if command:
+        w.handle_command(command)
+    rc = app.exec()
+    server.close()
+    exporter.close()
+    sys.exit(rc)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+"""Audio cues for phase transitions.
+
+Each cue is synthesised once into an in-memory WAV clip and handed to a
+sink. Sinks that actually play audio run on a worker thread behind a small
+queue, so ``CueEngine.play`` never blocks the tick path; when the queue is
+full the cue is dropped instead of waited for.
+"""
+from __future__ import annotations
+
+import io
+import math
+import os
+import queue
+import sys
+import threading
+import wave
+from array import array
+
+from . import paths
+
+SAMPLE_RATE = 22050
+
+# cue -> list of (frequency Hz, duration ms); 0 Hz is a gap
+CUES = {
+    "focus": [(660, 120), (0, 40), (880, 180)],  # rising: get going
+    "break": [(880, 120), (0, 40), (660, 180)],  # falling: wind down
+    "microbreak": [(740, 90)],  # short and soft: look away
+    }
+
+
+def render_cue(name: str, volume: float = 0.35) -> bytes:
+    """Returns the cue as 16-bit mono WAV bytes."""
+    samples = array("h")
+    fade = int(SAMPLE_RATE * 0.008)
+    for freq, ms in CUES[name]:
+        n = int(SAMPLE_RATE * ms / 1000)
+        if freq <= 0:
+            samples.extend([0] * n)
+            continue
+        step = 2 * math.pi * freq / SAMPLE_RATE
+        for i in range(n):
+            env = min(1.0, i / fade, (n - i) / fade)  # avoid clicks
+            samples.append(int(32767 * volume * env * math.sin(step * i)))
+
+    if sys.byteorder == "big":
+        samples.byteswap()
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+# ---------- Sinks ----------
+class NullSink:
+    """Plays nothing (tests, ``--sound off``)."""
+    threaded = False
+
+    def play(self, cue: str):
+        pass
+
+
+class BellSink:
+    """Terminal bell; the only 'sound' an SSH session has."""
+    threaded = False
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def play(self, cue: str):
+        self.stream.write("\a")
+        self.stream.flush()
+
+
+class CallbackSink:
+    """Calls a cheap, non-blocking function inline (e.g. QApplication.beep)."""
+    threaded = False
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def play(self, cue: str):
+        self.callback()
+
+
+# players that read WAV data from stdin: the cached clip is piped in
+STDIN_ARGS = {"pw-play": ["-"], "paplay": [], "aplay": ["-q", "-"]}
+
+
+class WaveSink:
+    """Plays the synthesised clips through the platform's audio player.
+
+    winsound and the Linux players get the in-memory clip directly;
+    only afplay needs a file, written once (on the worker thread) the
+    first time a cue is played and reused afterwards.
+    """
+    threaded = True
+
+    def __init__(self, player: str):
+        self.player = player
+        self._clips = {name: render_cue(name) for name in CUES}
+        self._stdin_args = STDIN_ARGS.get(os.path.basename(player))
+        self._files = {}
+
+    def _file(self, cue: str) -> str:
+        if cue not in self._files:
+            data = self._clips[cue]
+            path = os.path.join(paths.data_dir(), "cues", f"{cue}.wav")
+            try:
+                current = os.path.getsize(path)
+            except OSError:
+                current = -1
+            if current != len(data):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(data)
+            self._files[cue] = path
+        return self._files[cue]
+
+    @staticmethod
+    def find_player():
+        if sys.platform == "win32":
+            return "winsound"
+        import shutil
+
+        candidates = ("afplay",) if sys.platform == "darwin" else (
+            "pw-play", "paplay", "aplay")
+        for name in candidates:
+            path = shutil.which(name)
+            if path:
+                return path
+        return None
+
+    def play(self, cue: str):
+        if cue not in self._clips:
+            cue = "focus"
+        if self.player == "winsound":
+            import winsound
+
+            winsound.PlaySound(self._clips[cue], winsound.SND_MEMORY)
+            return
+
+        import subprocess
+
+        if self._stdin_args is not None:
+            subprocess.run(
+                [self.player, *self._stdin_args], input=self._clips[cue],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                timeout=10
+                )
+            return
+        subprocess.run(
+            [self.player, self._file(cue)], stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10
+            )
+
+
+def default_sink():
+    """A WaveSink if this machine can play audio, else None."""
+    player = WaveSink.find_player()
+    if player is None:
+        return None
+    try:
+        return WaveSink(player)
+    except OSError:
+        return None
+
+
+# ---------- Engine ----------
+class CueEngine:
+    def __init__(self, sink=None, max_pending: int = 4):
+        self.sink = sink or NullSink()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        if self.sink.threaded:
+            self._thread = threading.Thread(
+                target=self._run, name="studyclock-audio", daemon=True
+                )
+            self._thread.start()
+
+    def play(self, cue: str = "focus"):
+        if self._thread is None:
+            try:
+                self.sink.play(cue)
+            except Exception:
+                pass  # a broken speaker must not break the clock
+            return
+        try:
+            self._queue.put_nowait(cue)
+        except queue.Full:
+            pass  # drop rather than wait
+
+    __call__ = play
+
+    def close(self):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            cue = self._queue.get()
+            if cue is None:
+                return
+            try:
+                self.sink.play(cue)
+            except Exception:
+                pass
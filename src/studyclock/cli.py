@@ -0,0 +1,124 @@
+"""Command line entry point (``python -m studyclock``).
+
+Kept free of Qt imports so headless runs never load PySide6.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from .instance import COMMANDS, forward
+
+
+def profile_name(value: str) -> str:
+    from .profiles import NAME_RE
+
+    if not NAME_RE.match(value):
+        raise argparse.ArgumentTypeError(
+            "use up to 40 letters, digits, '-' or '_'"
+            )
+    return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="studyclock",
+        description="Minimal, distraction-free study timer.",
+        epilog="Tools: 'studyclock export --help' exports the recorded "
+               "history, 'studyclock aggregate --help' merges many users' "
+               "exports into group rollups, 'studyclock compact --help' "
+               "folds old history into daily totals.",
+        )
+    parser.add_argument(
+        "command", nargs="?",
+        choices=(*COMMANDS, "status"),
+        help="forwarded to the running instance (or applied on start); "
+             "'status' prints the live state without contacting it",
+        )
+    ui = parser.add_mutually_exclusive_group()
+    ui.add_argument(
+        "--headless", action="store_true",
+        help="run without a window, printing phase changes (no Qt needed)",
+        )
+    ui.add_argument(
+        "--tui", action="store_true",
+        help="run in the terminal with a live status line (no Qt needed)",
+        )
+    parser.add_argument(
+        "--notify", action="store_true",
+        help="headless/TUI: also send desktop notifications on transitions",
+        )
+    parser.add_argument(
+        "--sound", choices=("bell", "tones", "off"), default="bell",
+        help="headless/TUI cues: terminal bell (default), synthesised "
+             "tones through the system player, or silent",
+        )
+    parser.add_argument(
+        "--profile", type=profile_name, metavar="NAME",
+        help="use (or create) this profile's settings, state and history; "
+             "switches a running clock to it",
+        )
+    parser.add_argument(
+        "--metrics-port", type=int, default=0, metavar="PORT",
+        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics",
+        )
+    parser.add_argument(
+        "--metrics-file", default="", metavar="PATH",
+        help="rewrite Prometheus metrics to PATH every 15 s",
+        )
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["export"]:
+        from .export import main as export_main
+        return export_main(argv[1:])
+    if argv[:1] == ["compact"]:
+        from .history import main as compact_main
+        return compact_main(argv[1:])
+    if argv[:1] == ["aggregate"]:
+        from .aggregate import main as aggregate_main
+        return aggregate_main(argv[1:])
+
+    args, qt_args = build_parser().parse_known_args(argv)
+
+    if args.command == "status":
+        return print_status()
+
+    if forward(args.command, args.profile):
+        # handled by the running instance
+        if (args.headless or args.tui) and not args.command:
+            print("StudyClock is already running.", file=sys.stderr)
+        return 0
+
+    if args.headless or args.tui:
+        from .headless import run
+        return run(
+            tui=args.tui, use_notify=args.notify, sound=args.sound,
+            command=args.command, metrics_port=args.metrics_port,
+            metrics_file=args.metrics_file, profile=args.profile,
+            )
+
+    from .app import main as gui_main
+    return gui_main(
+        [sys.argv[0], *qt_args], command=args.command,
+        metrics_port=args.metrics_port, metrics_file=args.metrics_file,
+        profile=args.profile,
+        )
+
+
+def print_status() -> int:
+    from .headless import status_line
+    from .logic import StudyClockLogic
+    from .shared_state import SharedStateReader
+
+    reader = SharedStateReader()
+    state = reader.read()
+    if state is None:
+        print("No StudyClock state published yet.")
+        return 1
+    logic = StudyClockLogic(state, lambda: None, lambda cue: None)
+    suffix = "" if reader.pid else "  (not running)"
+    print(status_line(logic) + suffix)
+    return 0
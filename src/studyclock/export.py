@@ -0,0 +1,231 @@
+"""Streaming export of the recorded history.
+
+``python -m studyclock export`` runs a generator pipeline::
+
+    HistoryStore.iter_intervals -> clip -> split_buckets -> rollup -> writer
+
+Every stage handles one interval (or one bucket) at a time, so memory use
+doesn't depend on how many years of history there are. Rollup exports
+also merge in the days that were already compacted into daily totals.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import json
+import sys
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Tuple
+
+from .cli import profile_name
+from .history import (
+    KINDS, HistoryStore, Interval, bucket_start, day_start, split_buckets
+    )
+
+GRANULARITIES = ("raw", "day", "week", "month")
+FORMATS = ("csv", "jsonl", "parquet")
+
+RAW_FIELDS = ("start", "end", "kind", "duration_sec", "units", "goal")
+TEXT_FIELDS = ("start", "end", "kind", "period", "granularity")
+ROLLUP_FIELDS = (
+    "period", "granularity", *(f"{k}_sec" for k in KINDS), "running_sec",
+    "efficiency", "units", "goal",
+    )
+
+
+# ---------- Pipeline stages ----------
+def clip(
+    intervals: Iterable[Interval], since: float = None, until: float = None
+    ) -> Iterator[Interval]:
+    for iv in intervals:
+        start = iv.start if since is None else max(iv.start, since)
+        end, units = iv.end, iv.units
+        if until is not None and end > until:
+            end, units = until, 0  # the unit was completed after the range
+        if end > start or (units and end >= start):
+            yield iv._replace(start=start, end=end, units=units)
+
+
+def efficiency(running_sec: float, paused_sec: float) -> int:
+    """Same definition as StatsDialog: running / (running + paused)."""
+    den = max(1, running_sec + paused_sec)
+    return int(round((running_sec / den) * 100))
+
+
+def rollup(
+    pieces: Iterable[Tuple[datetime, Interval]], granularity: str
+    ) -> Iterator[dict]:
+    """Sums consecutive pieces of the same bucket (input is time-ordered)."""
+    current, row = None, None
+    for bucket, iv in pieces:
+        if bucket != current:
+            if row is not None:
+                yield finish_row(row)
+            current = bucket
+            row = {f"{k}_sec": 0.0 for k in KINDS}
+            row.update(
+                period=bucket.date().isoformat(), granularity=granularity,
+                units=0, goal=0
+                )
+        row[f"{iv.kind}_sec"] += iv.duration
+        row["units"] += iv.units
+        row["goal"] = max(row["goal"], iv.goal)
+    if row is not None:
+        yield finish_row(row)
+
+
+def finish_row(row: dict) -> dict:
+    running = sum(row[f"{k}_sec"] for k in KINDS if k != "paused")
+    row["running_sec"] = running
+    row["efficiency"] = efficiency(running, row["paused_sec"])
+    for key in row:
+        if key.endswith("_sec"):
+            row[key] = int(round(row[key]))
+    return {k: row[k] for k in ROLLUP_FIELDS}
+
+
+def raw_rows(intervals: Iterable[Interval]) -> Iterator[dict]:
+    for iv in intervals:
+        yield {
+            "start": datetime.fromtimestamp(iv.start).isoformat(
+                timespec="seconds"),
+            "end": datetime.fromtimestamp(iv.end).isoformat(
+                timespec="seconds"),
+            "kind": iv.kind,
+            "duration_sec": int(round(iv.duration)),
+            "units": iv.units,
+            "goal": iv.goal,
+            }
+
+
+def export_rows(
+    store: HistoryStore, since: float = None, until: float = None,
+    granularity: str = "raw"
+    ) -> Iterator[dict]:
+    intervals = clip(store.iter_intervals(since, until), since, until)
+    if granularity == "raw":
+        return raw_rows(intervals)
+    pieces = heapq.merge(
+        rollup_pieces(store.iter_rollups(since, until), granularity),
+        split_buckets(intervals, granularity),
+        key=lambda p: p[0],
+        )
+    return rollup(pieces, granularity)
+
+
+def rollup_pieces(
+    days: Iterable[Tuple[str, dict]], granularity: str
+    ) -> Iterator[Tuple[datetime, Interval]]:
+    """Compacted days as pseudo-intervals, so rollup() can sum them with
+    the raw ones (raw exports only cover what hasn't been compacted)."""
+    for day, totals in days:
+        ts = day_start(date.fromisoformat(day))
+        bucket = bucket_start(ts, granularity)
+        for kind in KINDS:
+            sec = totals[f"{kind}_sec"]
+            units = totals["units"] if kind == "focus" else 0
+            if sec or units:
+                yield bucket, Interval(ts, ts + sec, kind, units,
+                                       totals["goal"])
+
+
+# ---------- Writers ----------
+def write_csv(rows: Iterable[dict], fields, out):
+    w = csv.DictWriter(out, fieldnames=fields, lineterminator="\n")
+    w.writeheader()
+    for row in rows:
+        w.writerow(row)
+
+
+def write_jsonl(rows: Iterable[dict], fields, out):
+    for row in rows:
+        out.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+
+def write_parquet(rows: Iterable[dict], fields, path: str, batch=10000):
+    """Columnar output; written in row groups so memory stays bounded."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (f, pa.string() if f in TEXT_FIELDS else pa.int64()) for f in fields
+        ])
+    chunk = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= batch:
+                writer.write_table(pa.Table.from_pylist(chunk, schema))
+                chunk.clear()
+        if chunk:
+            writer.write_table(pa.Table.from_pylist(chunk, schema))
+
+
+# ---------- CLI ----------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="studyclock export",
+        description="Export recorded study history.",
+        )
+    parser.add_argument(
+        "--from", dest="since", type=date.fromisoformat, metavar="YYYY-MM-DD",
+        help="first day to include",
+        )
+    parser.add_argument(
+        "--to", dest="until", type=date.fromisoformat, metavar="YYYY-MM-DD",
+        help="last day to include",
+        )
+    parser.add_argument(
+        "--granularity", choices=GRANULARITIES, default="raw",
+        help="raw intervals or day/week/month rollups (default: raw)",
+        )
+    parser.add_argument(
+        "--format", choices=FORMATS, default="csv",
+        help="output format (default: csv; parquet needs pyarrow)",
+        )
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="output file (default: stdout; required for parquet)",
+        )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", help="history database to read")
+    source.add_argument(
+        "--profile", type=profile_name,
+        help="read this profile's history (default: default)",
+        )
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    since = day_start(args.since) if args.since else None
+    until = None
+    if args.until:
+        until = day_start(args.until + timedelta(days=1))
+    fields = RAW_FIELDS if args.granularity == "raw" else ROLLUP_FIELDS
+
+    if args.profile:
+        from .profiles import profile_history_file
+        args.db = profile_history_file(args.profile)
+    store = HistoryStore(args.db)
+    try:
+        rows = export_rows(store, since, until, args.granularity)
+        if args.format == "parquet":
+            if args.output == "-":
+                raise SystemExit("parquet export needs -o/--output")
+            write_parquet(rows, fields, args.output)
+            return 0
+
+        write = write_csv if args.format == "csv" else write_jsonl
+        if args.output == "-":
+            write(rows, fields, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8", newline="") as f:
+                write(rows, fields, f)
+    finally:
+        store.close()
+    return 0
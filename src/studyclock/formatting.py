@@ -0,0 +1,12 @@
+def format_time_mmss(sec: int) -> str:
+    sec = max(0, int(sec))
+    m = sec // 60
+    s = sec % 60
+    return f"{m:02d}:{s:02d}"
+
+
+def format_hm(sec: int) -> str:
+    sec = max(0, int(sec))
+    h = sec // 3600
+    m = (sec % 3600) // 60
+    return f"{h:d}:{m:02d}"
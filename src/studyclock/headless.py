@@ -0,0 +1,325 @@
+"""Qt-free clock: StudyClockLogic on a plain deadline loop.
+
+``--headless`` prints one line per phase change, ``--tui`` keeps a single
+status line with keyboard controls. Both read and write the same settings
+store as the GUI, so a session can move between them. The loop only uses
+``selectors``/``time`` (no asyncio, no Qt) to keep the process small.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import selectors
+import signal
+import sys
+import threading
+import time
+
+from . import metrics
+from .audio import BellSink, CueEngine, NullSink, default_sink
+from .formatting import format_hm, format_time_mmss
+from .instance import (
+    PROFILE_COMMAND, AlreadyRunning, InstanceServer, forward
+    )
+from .logic import StudyClockLogic
+from .persistence import NativeSettings
+from .profiles import ProfileManager
+from .shared_state import SharedStateWriter
+
+KEYS_HELP = (
+    "[space] start/pause  [s]kip  [b]ack  [r]eset  [l]unch  [u]ndo  "
+    "[y] redo  [q]uit"
+    )
+
+
+def phase_label(s) -> str:
+    if s.finished:
+        return "FINISHED"
+    if s.microbreak_active:
+        return "SCREEN BREAK"
+    if not s.running:
+        return "PAUSED"
+    return {"focus": "FOCUS", "break": "PAUSE"}.get(s.mode, "LUNCH")
+
+
+def notify(title: str, message: str):
+    """Fire-and-forget desktop notification, if the platform has a tool."""
+    import shutil
+    import subprocess
+
+    if sys.platform == "darwin" and shutil.which("osascript"):
+        cmd = [
+            "osascript", "-e",
+            f'display notification "{message}" with title "{title}"',
+            ]
+    elif shutil.which("notify-send"):
+        cmd = ["notify-send", title, message]
+    else:
+        return
+
+    try:
+        subprocess.Popen(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+            )
+    except OSError:
+        pass
+
+
+def status_line(logic: StudyClockLogic) -> str:
+    s = logic.s
+    if s.finished:
+        timer = "--:--"
+    elif s.microbreak_active:
+        timer = format_time_mmss(max(1, s.microbreak_remaining))
+    else:
+        timer = format_time_mmss(s.remaining)
+    done, left, total, pct = logic.calc_focus_progress()
+    return (
+        f"{phase_label(s):<12} {timer}  "
+        f"Unit {logic.current_unit()}/{s.session_goal}  "
+        f"{format_hm(done)}/{format_hm(total)} ({pct}%)"
+        )
+
+
+class HeadlessClock:
+    def __init__(
+        self, tui: bool = False, use_notify: bool = False, out=None,
+        sound: str = "bell", profile: str = None
+        ):
+        self.tui = tui
+        self.use_notify = use_notify
+        self.out = out or sys.stdout
+        if sound == "off":
+            self.audio = CueEngine(NullSink())
+        elif sound == "tones":
+            self.audio = CueEngine(default_sink() or BellSink(self.out))
+        else:
+            self.audio = CueEngine(BellSink(self.out))
+        self.profiles = ProfileManager(NativeSettings())
+        state = self.profiles.select(profile or self.profiles.current)
+        self.persist = self.profiles.writer(NativeSettings)
+        self.persist.notify(state, extra=self.profiles.index_values())
+        self.compactor = self.profiles.compactor()
+        self.logic = StudyClockLogic(
+            state=state, on_change=self.on_change, on_beep=self.beep
+            )
+        self.shared = SharedStateWriter()
+        self._last_phase = None
+        self._stopped = False
+        self._sel = None
+        self._commands = queue.SimpleQueue()
+        self._wake = threading.Event()
+
+    # ---------- Output ----------
+    def on_change(self):
+        self.persist.notify(self.logic.s)
+        self.shared.publish(self.logic.s)
+        metrics.observe_state(self.logic.s)
+        if self.tui:
+            self.out.write(f"\r\x1b[2K{status_line(self.logic)}")
+            self.out.flush()
+            return
+
+        phase = phase_label(self.logic.s)
+        if phase != self._last_phase:
+            self._last_phase = phase
+            stamp = time.strftime("%H:%M:%S")
+            self.out.write(f"[{stamp}] {status_line(self.logic)}\n")
+            self.out.flush()
+
+    def beep(self, cue: str = ""):
+        self.audio.play(cue)
+        if self.use_notify:
+            notify("StudyClock", phase_label(self.logic.s).title())
+
+    # ---------- Commands (keys + other launches) ----------
+    def run_command(self, command: str):
+        actions = {
+            "toggle": self.logic.toggle_play_pause,
+            "skip": self.logic.skip_phase,
+            "rewind": self.logic.rewind_phase,
+            "reset": self.logic.reset_all,
+            "lunch": self.logic.start_lunch_break,
+            "undo": self.logic.undo,
+            "redo": self.logic.redo,
+            }
+        if command in actions:
+            actions[command]()
+            self.on_change()
+        elif command.startswith(PROFILE_COMMAND):
+            try:
+                self.switch_profile(command[len(PROFILE_COMMAND):])
+            except ValueError:
+                pass
+
+    def switch_profile(self, name: str):
+        if name == self.profiles.current:
+            return
+        old = self.logic.s
+        self.profiles.create(name)  # validates the name
+        was_running, old.running = old.running, False
+        self.compactor.close(wait=False)
+        old_writer = self.persist
+        old_writer.close(old, wait=False)
+
+        state = self.profiles.select(name)
+        # no play button in headless mode: keep the clock going, without
+        # passing through a paused state
+        state.running = was_running and not state.finished
+        self.persist = self.profiles.writer(
+            NativeSettings, after=old_writer.join
+            )
+        self.persist.notify(state, extra=self.profiles.index_values())
+        self.compactor = self.profiles.compactor()
+        self._last_phase = None  # print the new profile's status line
+        self.logic.replace_state(state)
+
+    def post_command(self, command: str):
+        """Thread-safe; called by the instance server."""
+        self._commands.put(command)
+        self._wake.set()
+
+    def _drain_commands(self):
+        while not self._commands.empty():
+            self.run_command(self._commands.get())
+
+    def on_key(self, ch: str):
+        keys = {
+            " ": "toggle", "s": "skip", "b": "rewind", "r": "reset",
+            "l": "lunch", "u": "undo", "y": "redo",
+            }
+        if ch in ("q", "\x03"):
+            self.stop()
+        elif ch in keys:
+            self.run_command(keys[ch])
+
+    def _read_keys(self, timeout: float):
+        """Waits up to ``timeout`` seconds, dispatching any key presses."""
+        if self._sel is None:
+            if sys.platform == "win32" and self.tui and sys.stdin.isatty():
+                import msvcrt
+
+                end = time.monotonic() + timeout
+                while not self._stopped:
+                    while msvcrt.kbhit():
+                        self.on_key(msvcrt.getwch().lower())
+                    left = end - time.monotonic()
+                    if left <= 0:
+                        return
+                    time.sleep(min(0.1, left))
+                return
+            self._wake.wait(timeout)
+            self._wake.clear()
+            return
+
+        # short slices so forwarded commands are picked up promptly
+        fd = sys.stdin.fileno()
+        if self._sel.select(min(timeout, 0.25)):
+            for ch in os.read(fd, 32).decode(errors="ignore"):
+                self.on_key(ch.lower())
+
+    # ---------- Loop ----------
+    def stop(self, *_):
+        self._stopped = True
+        self._wake.set()
+
+    def run(
+        self, start: bool = True, command: str = None,
+        server: InstanceServer = None
+        ):
+        self._stopped = False
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        if server is not None:
+            server.serve(self.post_command)
+
+        old_tty = None
+        if self.tui and sys.platform != "win32" and sys.stdin.isatty():
+            import termios
+            import tty
+
+            fd = sys.stdin.fileno()
+            old_tty = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+            self._sel = selectors.DefaultSelector()
+            self._sel.register(fd, selectors.EVENT_READ)
+
+        if self.tui:
+            self.out.write(KEYS_HELP + "\n")
+        if start:
+            self.logic.start()
+        self.on_change()
+        if command:
+            self.run_command(command)
+
+        # deadline-based 1 s ticks, so the clock doesn't drift with load
+        deadline = time.monotonic()
+        try:
+            while not self._stopped:
+                deadline += 1.0
+                now = time.monotonic()
+                if now - deadline > 5.0:
+                    # suspended/stalled: resync instead of bursting ticks
+                    deadline = now
+                while not self._stopped:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._read_keys(left)
+                    self._drain_commands()
+                if self._stopped:
+                    break
+                metrics.TICK_LATENESS.observe(
+                    max(0.0, time.monotonic() - deadline)
+                    )
+                metrics.TICKS.inc()
+                self.logic.on_tick()
+                self.logic.on_pause_count_tick()
+                self.persist.heartbeat(self.logic.s)
+        finally:
+            if server is not None:
+                server.close()
+            if old_tty is not None:
+                import termios
+
+                self._sel.close()
+                self._sel = None
+                termios.tcsetattr(
+                    sys.stdin.fileno(), termios.TCSADRAIN, old_tty
+                    )
+            if self.tui:
+                self.out.write("\n")
+            self.audio.close()
+            self.compactor.close()
+            self.persist.close(self.logic.s)
+            self.shared.close(self.logic.s)
+
+
+def run(
+    tui: bool = False, use_notify: bool = False, sound: str = "bell",
+    command: str = None, metrics_port: int = 0, metrics_file: str = "",
+    profile: str = None
+    ) -> int:
+    # claim the instance socket before touching any state
+    try:
+        server = InstanceServer()
+    except AlreadyRunning:
+        forward(command, profile)
+        print("StudyClock is already running.", file=sys.stderr)
+        return 0
+    except OSError as e:
+        print(f"StudyClock: cannot open the instance socket: {e}",
+              file=sys.stderr)
+        return 1
+
+    exporter = metrics.MetricsExporter(metrics_port, metrics_file)
+    clock = HeadlessClock(
+        tui=tui, use_notify=use_notify, sound=sound, profile=profile
+        )
+    try:
+        # TUI starts paused like the window; headless has no play button
+        clock.run(start=not tui, command=command, server=server)
+    finally:
+        exporter.close()
+    return 0
@@ -0,0 +1,407 @@
+"""Recorded phase intervals (focus / break / lunch / microbreak / paused).
+
+Intervals live in a small SQLite file next to the other app data. They are
+appended by the persistence writer thread and read back as streams by the
+export tooling, so neither side ever holds the whole history in memory.
+
+Raw intervals older than the retention horizon are folded into per-day
+rollups (the totals StatsDialog works with) by a background
+:class:`Compactor`, in small chunks, and the freed pages are returned to
+the file system with incremental vacuum.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import paths
+from .logic import ClockState
+
+KINDS = ("focus", "break", "lunch", "microbreak", "paused")
+RETENTION_DAYS = 90
+# heartbeats further apart than this mean the clock wasn't ticking
+STALL_SEC = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intervals (
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    kind TEXT NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    goal INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS intervals_start ON intervals(start);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT PRIMARY KEY,
+    focus_sec REAL NOT NULL DEFAULT 0,
+    break_sec REAL NOT NULL DEFAULT 0,
+    lunch_sec REAL NOT NULL DEFAULT 0,
+    microbreak_sec REAL NOT NULL DEFAULT 0,
+    paused_sec REAL NOT NULL DEFAULT 0,
+    units INTEGER NOT NULL DEFAULT 0,
+    goal INTEGER NOT NULL DEFAULT 0
+);
+"""
+ROLLUP_COLS = (*(f"{k}_sec" for k in KINDS), "units")
+
+
+class Interval(NamedTuple):
+    start: float  # epoch seconds
+    end: float
+    kind: str
+    units: int  # net focus units completed (negative: taken back)
+    goal: int  # session_goal at the time
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def history_file() -> str:
+    return os.path.join(paths.data_dir(), "history.sqlite3")
+
+
+def bucket_start(ts: float, granularity: str) -> datetime:
+    d = datetime.fromtimestamp(ts).date()
+    if granularity == "week":
+        d -= timedelta(days=d.weekday())
+    elif granularity == "month":
+        d = d.replace(day=1)
+    return datetime(d.year, d.month, d.day)
+
+
+def next_bucket(start: datetime, granularity: str) -> datetime:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def split_buckets(
+    intervals: Iterable[Interval], granularity: str
+    ) -> Iterator[Tuple[datetime, Interval]]:
+    """Cuts intervals at local day/week/month boundaries."""
+    for iv in intervals:
+        start = iv.start
+        bucket = bucket_start(start, granularity)
+        while True:
+            edge = next_bucket(bucket, granularity).timestamp()
+            if iv.end <= edge:
+                yield bucket, iv._replace(start=start)
+                break
+            # units are credited to the piece where the interval ended
+            yield bucket, iv._replace(start=start, end=edge, units=0)
+            start = edge
+            bucket = next_bucket(bucket, granularity)
+
+
+def day_start(d: date) -> float:
+    return datetime(d.year, d.month, d.day).timestamp()
+
+
+def retention_horizon(days: int, now: float = None) -> float:
+    """Local midnight ``days`` days ago."""
+    today = datetime.fromtimestamp(time.time() if now is None else now)
+    return day_start(today.date() - timedelta(days=days))
+
+
+def interval_kind(s: ClockState) -> Optional[str]:
+    if s.finished:
+        return None
+    if s.microbreak_active:
+        return "microbreak"
+    if not s.running:
+        return "paused"
+    return s.mode
+
+
+class IntervalRecorder:
+    """Turns a stream of state snapshots into closed intervals.
+
+    Units are the change of ``ClockState.history_units``, which only unit
+    completions move (and rewinds/undos reverse), never settings or
+    resets. :meth:`heartbeat` is expected once per second: a longer gap
+    (suspend, stalled process) ends the open interval one second after
+    the last heartbeat, so time the clock never ticked isn't recorded.
+    """
+
+    def __init__(self):
+        self._kind = None
+        self._start = 0.0
+        self._units = 0
+        self._seen = None
+
+    def observe(self, s: ClockState, now: float = None) -> List[Interval]:
+        now = time.time() if now is None else now
+        closed = self._stalled(s, now)
+        kind = interval_kind(s)
+        if kind != self._kind:
+            closed += self._close(s, now)
+            self._open(s, kind, now)
+        return closed
+
+    def heartbeat(self, s: ClockState, now: float = None) -> List[Interval]:
+        return self._stalled(s, time.time() if now is None else now)
+
+    def close(self, s: ClockState, now: float = None) -> List[Interval]:
+        now = time.time() if now is None else now
+        closed = self._stalled(s, now) + self._close(s, now)
+        self._kind = None
+        return closed
+
+    def _open(self, s: ClockState, kind: Optional[str], now: float):
+        self._kind, self._start, self._units = kind, now, s.history_units
+
+    def _stalled(self, s: ClockState, now: float) -> List[Interval]:
+        seen, self._seen = self._seen, now
+        if self._kind is None or seen is None or now - seen <= STALL_SEC:
+            return []
+        closed = self._close(s, min(seen + 1.0, now))
+        self._open(s, self._kind, now)
+        return closed
+
+    def _close(self, s: ClockState, end: float) -> List[Interval]:
+        if self._kind is None:
+            return []
+        units = s.history_units - self._units
+        if end - self._start < 0.5 and not units:
+            return []  # exported as 0 s: a state passed through, not a phase
+        return [Interval(
+            self._start, max(end, self._start), self._kind, units,
+            s.session_goal
+            )]
+
+
+class HistoryStore:
+    def __init__(self, path: str = None):
+        # imported lazily: a clock that hasn't closed an interval yet
+        # doesn't pay for sqlite3
+        import sqlite3
+
+        self.path = path or history_file()
+        self.conn = sqlite3.connect(self.path)
+        # only takes effect on a new file; `compact --vacuum` converts
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def append(self, intervals):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO intervals (start, end, kind, units, goal) "
+                "VALUES (?, ?, ?, ?, ?)", intervals
+                )
+
+    def iter_intervals(
+        self, since: float = None, until: float = None, batch: int = 1000
+        ) -> Iterator[Interval]:
+        """Intervals overlapping [since, until), oldest first."""
+        query = "SELECT start, end, kind, units, goal FROM intervals"
+        where, args = [], []
+        if since is not None:
+            where.append("end > ?")
+            args.append(since)
+        if until is not None:
+            where.append("start < ?")
+            args.append(until)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY start"
+
+        cur = self.conn.execute(query, args)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            for row in rows:
+                yield Interval(*row)
+
+    def iter_rollups(
+        self, since: float = None, until: float = None
+        ) -> Iterator[Tuple[str, dict]]:
+        """Compacted days in [since, until), oldest first."""
+        cols = ", ".join((*ROLLUP_COLS, "goal"))
+        query = f"SELECT day, {cols} FROM daily_rollups"
+        where, args = [], []
+        if since is not None:
+            where.append("day >= ?")
+            args.append(datetime.fromtimestamp(since).date().isoformat())
+        if until is not None:
+            where.append("day < ?")
+            args.append(datetime.fromtimestamp(until).date().isoformat())
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY day"
+        for row in self.conn.execute(query, args):
+            yield row[0], dict(zip((*ROLLUP_COLS, "goal"), row[1:]))
+
+    # ---------- Retention ----------
+    def compact_step(self, horizon: float, chunk: int = 500) -> int:
+        """Folds up to ``chunk`` intervals that ended before ``horizon``
+        into daily rollups. Returns how many were folded (0 = done)."""
+        rows = self.conn.execute(
+            "SELECT rowid, start, end, kind, units, goal FROM intervals "
+            "WHERE end <= ? ORDER BY start LIMIT ?", (horizon, chunk)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        days = {}
+        pieces = split_buckets((Interval(*r[1:]) for r in rows), "day")
+        for bucket, iv in pieces:
+            day = days.setdefault(
+                bucket.date().isoformat(), dict.fromkeys(ROLLUP_COLS, 0)
+                )
+            day[f"{iv.kind}_sec"] += iv.duration
+            day["units"] += iv.units
+            day["goal"] = max(day.get("goal", 0), iv.goal)
+
+        cols = (*ROLLUP_COLS, "goal")
+        adds = ", ".join(
+            f"{c} = {c} + excluded.{c}" for c in ROLLUP_COLS
+            )
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO daily_rollups (day, {', '.join(cols)}) "
+                f"VALUES (?{', ?' * len(cols)}) "
+                f"ON CONFLICT(day) DO UPDATE SET {adds}, "
+                f"goal = max(goal, excluded.goal)",
+                [(d, *(v[c] for c in cols)) for d, v in days.items()]
+                )
+            self.conn.executemany(
+                "DELETE FROM intervals WHERE rowid = ?",
+                [(r[0],) for r in rows]
+                )
+        return len(rows)
+
+    def vacuum_step(self, pages: int = 256) -> int:
+        """Releases up to ``pages`` free pages; returns how many remain."""
+        mode = self.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != 2:  # not INCREMENTAL: freed pages are just reused
+            return 0
+        self.conn.execute(
+            f"PRAGMA incremental_vacuum({int(pages)})"
+            ).fetchall()
+        return self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def vacuum_full(self):
+        """One-off full VACUUM; also switches old files to incremental."""
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("VACUUM")
+
+
+class Compactor:
+    """Background retention: compacts in chunks, pausing in between so the
+    history writer is never locked out for long."""
+
+    def __init__(
+        self, retention_days: int = RETENTION_DAYS, path: str = None,
+        every: float = 3600.0, chunk: int = 500, pause: float = 0.05
+        ):
+        self.retention_days = retention_days
+        self.path = path
+        self.every = every
+        self.chunk = chunk
+        self.pause = pause
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="studyclock-compact", daemon=True
+            )
+        self._thread.start()
+
+    def close(self, timeout: float = 2.0, wait: bool = True):
+        self._stop.set()
+        if wait:
+            # a running chunk stops at its next pause
+            self._thread.join(timeout)
+
+    def _run(self):
+        if self.retention_days <= 0:
+            return
+        # let startup finish before touching the disk
+        if self._stop.wait(min(self.every, 30.0)):
+            return
+        import sqlite3
+
+        store = HistoryStore(self.path)
+        try:
+            while not self._stop.is_set():
+                horizon = retention_horizon(self.retention_days)
+                try:
+                    while not self._stop.is_set():
+                        if not store.compact_step(horizon, self.chunk):
+                            break
+                        self._stop.wait(self.pause)
+                    while not self._stop.is_set():
+                        if not store.vacuum_step():
+                            break
+                        self._stop.wait(self.pause)
+                except sqlite3.Error:
+                    pass  # locked/busy: try again next round
+                self._stop.wait(self.every)
+        finally:
+            store.close()
+
+
+# ---------- CLI ----------
+def main(argv=None) -> int:
+    from .cli import profile_name
+
+    parser = argparse.ArgumentParser(
+        prog="studyclock compact",
+        description="Fold old raw history into daily rollups.",
+        )
+    parser.add_argument(
+        "--retention-days", type=int, default=RETENTION_DAYS,
+        help="keep raw intervals this many days, 0 keeps everything like "
+        "history_retention_days (default: %(default)s)",
+        )
+    parser.add_argument(
+        "--vacuum", action="store_true",
+        help="also run a full VACUUM (blocks writers while it runs)",
+        )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", help="history database to compact")
+    source.add_argument(
+        "--profile", type=profile_name,
+        help="compact this profile's history",
+        )
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        from .profiles import profile_history_file
+        args.db = profile_history_file(args.profile)
+    store = HistoryStore(args.db)
+    total = 0
+    horizon = None
+    try:
+        if args.retention_days > 0:  # same rule as the Compactor
+            horizon = retention_horizon(args.retention_days)
+        while horizon is not None:
+            n = store.compact_step(horizon, chunk=5000)
+            if not n:
+                break
+            total += n
+        if args.vacuum:
+            store.vacuum_full()
+        else:
+            while store.vacuum_step(pages=4096):
+                pass
+    finally:
+        store.close()
+    if horizon is None:
+        print("Retention is off (0 days): nothing compacted.")
+    else:
+        print(f"Compacted {total} intervals older than "
+              f"{datetime.fromtimestamp(horizon).date().isoformat()}.")
+    return 0
@@ -0,0 +1,222 @@
+"""Single-instance coordination.
+
+The first StudyClock process listens on a per-user local socket (a named
+pipe on Windows). Later launches connect, forward their command and exit,
+so there is only ever one clock writing the settings store.
+
+Messages use multiprocessing.connection's framing (a 4-byte big-endian
+length, then the bytes). On Unix that is spoken directly over a socket:
+importing multiprocessing costs a headless clock ~3 MB of RSS for one
+short message per launch; named pipes still go through it.
+"""
+from __future__ import annotations
+
+import getpass
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+
+from . import paths
+
+COMMANDS = (
+    "show", "toggle", "skip", "rewind", "reset", "lunch", "undo", "redo",
+    )
+# "profile:<name>" switches the running clock to another profile
+PROFILE_COMMAND = "profile:"
+
+
+def is_command(command: str) -> bool:
+    if command.startswith(PROFILE_COMMAND):
+        return len(command) > len(PROFILE_COMMAND)
+    return command in COMMANDS
+
+
+def address():
+    if sys.platform == "win32":
+        return rf"\\.\pipe\StudyClock-{getpass.getuser()}", "AF_PIPE"
+    return os.path.join(paths.runtime_dir(), "instance.sock"), "AF_UNIX"
+
+
+# ---------- Transport ----------
+class _SocketConnection:
+    """The subset of multiprocessing.connection.Connection used here."""
+
+    def __init__(self, sock):
+        self._sock = sock
+
+    def send_bytes(self, data: bytes):
+        self._sock.sendall(struct.pack("!i", len(data)) + data)
+
+    def _recv(self, n: int) -> bytes:
+        buf = b""
+        while len(buf) < n:
+            chunk = self._sock.recv(n - len(buf))
+            if not chunk:
+                raise EOFError
+            buf += chunk
+        return buf
+
+    def recv_bytes(self, maxlength: int = None) -> bytes:
+        size, = struct.unpack("!i", self._recv(4))
+        if size < 0 or (maxlength is not None and size > maxlength):
+            raise OSError("bad message length")
+        return self._recv(size)
+
+    def poll(self, timeout: float = 0.0) -> bool:
+        return bool(select.select([self._sock], [], [], timeout)[0])
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _SocketListener:
+    def __init__(self, addr: str):
+        self._addr = addr
+        self._sock = socket.socket(socket.AF_UNIX)
+        try:
+            self._sock.bind(addr)
+            self._sock.listen()
+        except OSError:
+            self._sock.close()
+            raise
+
+    def accept(self) -> _SocketConnection:
+        return _SocketConnection(self._sock.accept()[0])
+
+    def close(self):
+        if self._sock.fileno() < 0:
+            return
+        self._sock.close()
+        try:
+            os.unlink(self._addr)
+        except OSError:
+            pass
+
+
+def _connect(addr, family):
+    if family == "AF_UNIX":
+        sock = socket.socket(socket.AF_UNIX)
+        try:
+            sock.connect(addr)
+        except OSError:
+            sock.close()
+            raise
+        return _SocketConnection(sock)
+    from multiprocessing.connection import Client
+
+    return Client(addr, family=family)
+
+
+def _listen(addr, family):
+    if family == "AF_UNIX":
+        return _SocketListener(addr)
+    from multiprocessing.connection import Listener
+
+    return Listener(addr, family=family)
+
+
+# ---------- Commands ----------
+def send_command(command: str, timeout: float = 2.0) -> bool:
+    """Forwards ``command`` to a running instance; False if there is none."""
+    addr, family = address()
+    if family == "AF_UNIX" and not os.path.exists(addr):
+        return False
+    try:
+        conn = _connect(addr, family)
+    except OSError:
+        return False
+    with conn:
+        conn.send_bytes(command.encode())
+        if conn.poll(timeout):
+            try:
+                conn.recv_bytes()
+            except (EOFError, OSError):
+                pass
+    return True
+
+
+def forward(command: str = None, profile: str = None) -> bool:
+    """Hands a launch's profile and command to the running instance."""
+    if profile and not send_command(PROFILE_COMMAND + profile):
+        return False
+    return send_command(command or "show")
+
+
+def _answers(addr, family) -> bool:
+    try:
+        conn = _connect(addr, family)
+    except OSError:
+        return False
+    conn.close()
+    return True
+
+
+class AlreadyRunning(OSError):
+    """Another instance owns the socket and accepts connections."""
+
+
+class InstanceServer:
+    """Owns the instance socket; :meth:`serve` accepts commands from later
+    launches on a daemon thread.
+
+    Created before the clock is, so a launch that loses the race to
+    another one raises :class:`AlreadyRunning` instead of starting a second
+    clock. ``handler`` is called from the server thread; GUI code should
+    hand it to a Qt signal, headless code to a queue.
+    """
+
+    def __init__(self):
+        addr, family = address()
+        try:
+            self._listener = _listen(addr, family)
+        except OSError:
+            if _answers(addr, family):
+                raise AlreadyRunning(f"StudyClock is already running ({addr})")
+            if family != "AF_UNIX":
+                raise
+            # nobody answers: stale socket left by a crashed instance
+            os.unlink(addr)
+            self._listener = _listen(addr, family)
+        self._handler = None
+        self._thread = None
+
+    def serve(self, handler):
+        self._handler = handler
+        self._thread = threading.Thread(
+            target=self._run, name="studyclock-instance", daemon=True
+            )
+        self._thread.start()
+
+    def close(self):
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+
+    def _run(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return  # listener closed
+            with conn:
+                try:
+                    command = conn.recv_bytes(64).decode(errors="ignore")
+                except (EOFError, OSError):
+                    continue
+                known = is_command(command)
+                if known:
+                    self._handler(command)
+                try:
+                    conn.send_bytes(b"ok" if known else b"unknown")
+                except OSError:
+                    pass
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections import deque
+from dataclasses import dataclass, field, fields
+from functools import wraps
 from typing import Callable, Set
 
 DEFAULT_REMIND_AT = {40 * 60, 20 * 60, 0}
+LUNCH_SEC = 60 * 60
+UNDO_LIMIT = 200
 
 
 @dataclass
@@ -27,6 +31,14 @@ class ClockState:
     pre_lunch_remaining: int = 0
     pre_lunch_was_running: bool = False
 
+    # How many of the top completed units were earned by finishing them
+    # (not set via settings); rewinding one of those takes its credit back.
+    credited_units: int = 0
+    # Net units credited to the recorded history: +1 per finished unit,
+    # -1 per rewound credited unit. Undo/redo restore it with the rest of
+    # the state, so the history sees their exact reverse.
+    history_units: int = 0
+
     reminded_this_focus: Set[int] = field(default_factory=set)
     remind_at: Set[int] = field(default_factory=lambda: set(DEFAULT_REMIND_AT))
 
@@ -37,16 +49,46 @@ class ClockState:
     focus_work_sec: int = 0
 
 
+STAT_FIELDS = ("total_open_sec", "paused_sec", "microbreak_sec",
+               "focus_work_sec")
+STATE_FIELDS = tuple(
+    f.name for f in fields(ClockState) if f.name not in STAT_FIELDS
+    )
+
+
+def undoable(method):
+    """Records the state before ``method`` so it can be undone exactly.
+
+    Entries are (state, stats before, stats after): stats keep counting
+    real time, so undo/redo only reverts what the action itself did to
+    them (e.g. a reset zeroing them) and keeps the time elapsed since.
+    ``history_units`` is part of the state, so undoing a finished unit
+    shows up in the recorded history as -1 (and redoing it as +1).
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        before, stats_before = self._snapshot()
+        result = method(self, *args, **kwargs)
+        after, stats_after = self._snapshot()
+        if (after, stats_after) != (before, stats_before):
+            self._undo.append((before, stats_before, stats_after))
+            self._redo = deque(maxlen=UNDO_LIMIT)
+        return result
+    return wrapper
+
+
 class StudyClockLogic:
     def __init__(
         self,
         state: ClockState,
         on_change: Callable[[], None],
-        on_beep: Callable[[], None],
+        on_beep: Callable[[str], None],
         ):
         self.s = state
         self._on_change = on_change
         self._beep = on_beep
+        self._undo = deque(maxlen=UNDO_LIMIT)
+        self._redo = deque(maxlen=UNDO_LIMIT)
 
     # ---------- Derived ----------
     def current_unit(self) -> int:
@@ -54,6 +96,16 @@ class StudyClockLogic:
             return self.s.session_goal
         return min(self.s.completed_units + 1, self.s.session_goal)
 
+    def phase_total_sec(self) -> int:
+        """Full length of the current phase (microbreak included)."""
+        if self.s.microbreak_active:
+            return self.s.micro_sec
+        if self.s.mode == "focus":
+            return self.s.focus_min * 60
+        if self.s.mode == "lunch":
+            return LUNCH_SEC
+        return self.s.break_min * 60
+
     def calc_focus_progress(self):
         focus_block = self.s.focus_min * 60
         total = self.s.session_goal * focus_block
@@ -78,14 +130,15 @@ class StudyClockLogic:
     def switch_to_break(self):
         self.s.mode = "break"
         self.s.remaining = self.s.break_min * 60
-        self._beep()
+        self._beep("break")
 
     def switch_to_focus(self):
         self.s.mode = "focus"
         self.s.remaining = self.s.focus_min * 60
         self.s.reminded_this_focus.clear()
-        self._beep()
+        self._beep("focus")
 
+    @undoable
     def start_lunch_break(self):
         if self.s.finished:
             return
@@ -97,13 +150,13 @@ class StudyClockLogic:
         self.s.microbreak_remaining = 0
         self.s.after_micro = ""
         self.s.mode = "lunch"
-        self.s.remaining = 60 * 60
+        self.s.remaining = LUNCH_SEC
         self.s.running = True
         self._on_change()
 
     # ---------- microbreak ----------
     def start_microbreak(self, after_micro: str):
-        # no text, only internal timer + beep
+        # no text, only internal timer + cue
         if self.s.micro_sec <= 0:
             self.s.after_micro = after_micro
             self.end_microbreak()
@@ -113,7 +166,7 @@ class StudyClockLogic:
         self._on_change()
         self.s.microbreak_remaining = self.s.micro_sec
         self.s.after_micro = after_micro
-        self._beep()
+        self._beep("microbreak")
         self._on_change()
 
     def end_microbreak(self):
@@ -134,6 +187,8 @@ class StudyClockLogic:
     def finish_focus_unit(self, use_microbreak_before_break: bool = True):
         # finish unit
         self.s.completed_units += 1
+        self.s.credited_units += 1
+        self.s.history_units += 1
 
         if self.s.completed_units >= self.s.session_goal:
             self.mark_finished()
@@ -165,12 +220,14 @@ class StudyClockLogic:
         else:
             self.start()
 
+    @undoable
     def reset_all(self):
         # --- running condition ---
         self.s.running = False
         self.s.mode = "focus"
         self.s.remaining = self.s.focus_min * 60
         self.s.completed_units = 0
+        self.s.credited_units = 0
         self.s.finished = False
 
         # --- Microbreak ---
@@ -187,6 +244,7 @@ class StudyClockLogic:
 
         self._on_change()
 
+    @undoable
     def skip_phase(self):
         if self.s.finished:
             return
@@ -205,6 +263,7 @@ class StudyClockLogic:
         self.switch_to_focus()
         self._on_change()
 
+    @undoable
     def rewind_phase(self):
         if self.s.finished:
             return
@@ -231,9 +290,67 @@ class StudyClockLogic:
         if self.s.mode == "focus":
             if self.s.completed_units > 0:
                 self.s.completed_units -= 1
+                if self.s.credited_units > 0:
+                    self.s.credited_units -= 1
+                    self.s.history_units -= 1
             self.switch_to_break()
             self._on_change()
 
+    # ---------- Undo / redo ----------
+    def _snapshot(self):
+        s = self.s
+        state = tuple(
+            frozenset(v) if isinstance(v, set) else v
+            for v in (getattr(s, name) for name in STATE_FIELDS)
+            )
+        return state, tuple(getattr(s, name) for name in STAT_FIELDS)
+
+    def _switch(self, source: deque, target: deque) -> bool:
+        if not source:
+            return False
+        state, stats_then, stats_switch = source.pop()
+        now_state, now_stats = self._snapshot()
+        stats = tuple(
+            then + (now - switch)
+            for then, now, switch in zip(stats_then, now_stats, stats_switch)
+            )
+        target.append((now_state, now_stats, stats))
+
+        for name, value in zip(STATE_FIELDS, state):
+            setattr(self.s, name, set(value) if isinstance(
+                value, frozenset) else value)
+        for name, value in zip(STAT_FIELDS, stats):
+            setattr(self.s, name, value)
+        self._on_change()
+        return True
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> bool:
+        """Reverts the last skip/rewind/reset/lunch/settings change."""
+        return self._switch(self._undo, self._redo)
+
+    def redo(self) -> bool:
+        return self._switch(self._redo, self._undo)
+
+    def replace_state(self, state: ClockState):
+        """Swaps in another ClockState (profile switch); history is per
+        state, so undo/redo starts over."""
+        self.s = state
+        self._forget_history()
+        self._on_change()
+
+    def _forget_history(self):
+        """Undo barrier: snapshots from before a tick-driven transition
+        would roll back the work that finished since (a completed unit,
+        a break taken), so they are dropped."""
+        self._undo = deque(maxlen=UNDO_LIMIT)
+        self._redo = deque(maxlen=UNDO_LIMIT)
+
     # ---------- Tick handlers ----------
     def on_tick(self):
         """Called once per second, but only if running==True (window
@@ -249,6 +366,7 @@ class StudyClockLogic:
             self.s.microbreak_remaining -= 1
 
             if self.s.microbreak_remaining <= 0:
+                self._forget_history()
                 self.end_microbreak()  # calls _on_change() already
                 return
 
@@ -269,17 +387,20 @@ class StudyClockLogic:
             self.s.reminded_this_focus.add(self.s.remaining)
 
             if self.s.remaining in (40 * 60, 20 * 60):
+                self._forget_history()
                 self.start_microbreak(after_micro="resume_focus")
                 return
 
             if self.s.remaining == 0:
                 # Focus ends: Complete unit immediately (with microbreak,
                 # then break)
+                self._forget_history()
                 self.finish_focus_unit()
                 return
 
         # Phase end without reminder branch
         if self.s.remaining <= 0:
+            self._forget_history()
             if self.s.mode == "focus":
                 self.finish_focus_unit()
             else:
@@ -304,6 +425,7 @@ class StudyClockLogic:
             self.s.paused_sec += 1
 
     # ---------- Settings apply ----------
+    @undoable
     def apply_settings(
         self, focus_min: int, break_min: int, micro_sec: int, goal: int,
         start_unit: int
@@ -314,7 +436,16 @@ class StudyClockLogic:
         self.s.session_goal = int(goal)
 
         start_unit = max(1, min(int(start_unit), self.s.session_goal))
-        self.s.completed_units = start_unit - 1
+        completed = start_unit - 1
+        if completed > self.s.completed_units:
+            # units skipped ahead to were never worked
+            self.s.credited_units = 0
+        else:
+            self.s.credited_units = max(
+                0,
+                self.s.credited_units - (self.s.completed_units - completed)
+                )
+        self.s.completed_units = completed
         self.s.finished = False
 
         if (not self.s.running) and (not self.s.microbreak_active):
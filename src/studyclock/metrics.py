@@ -0,0 +1,233 @@
+"""Counters and gauges in Prometheus text format.
+
+The metric objects are module globals (like prometheus_client's default
+registry) so any part of the app can bump them; they are plain numbers
+behind a lock and cost next to nothing when nobody scrapes them. Export
+is opt-in: a localhost HTTP endpoint and/or a file rewritten every few
+seconds for node_exporter's textfile collector.
+"""
+from __future__ import annotations
+
+import math
+import sys
+import threading
+
+from .history import KINDS, interval_kind
+
+_lock = threading.Lock()
+_metrics = []
+
+
+def format_value(value) -> str:
+    """Exact sample text: ints in full, floats round-tripping (not %g)."""
+    if isinstance(value, int):
+        return str(int(value))  # bool -> 0/1
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label: str = None):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values = {}
+        _metrics.append(self)
+
+    def _key(self, label_value):
+        if self.label is None:
+            return ""
+        return f'{{{self.label}="{label_value}"}}'
+
+    def samples(self):
+        with _lock:
+            return [(self.name + k, v) for k, v in self._values.items()]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+            ]
+        lines.extend(
+            f"{name} {format_value(value)}" for name, value in self.samples()
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, label_value: str = None):
+        key = self._key(label_value)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, label_value: str = None):
+        with _lock:
+            self._values[self._key(label_value)] = value
+
+
+class Summary(Metric):
+    """Sum and count only (no quantiles), enough for rates and averages."""
+    kind = "summary"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values = {"_sum": 0.0, "_count": 0}
+
+    def observe(self, value: float):
+        with _lock:
+            self._values["_sum"] += value
+            self._values["_count"] += 1
+
+
+# ---------- App metrics ----------
+TICKS = Counter("studyclock_ticks_total", "Clock ticks processed.")
+TRANSITIONS = Counter(
+    "studyclock_transitions_total", "Phase transitions by target phase.",
+    label="to",
+    )
+UPDATE_UI = Summary(
+    "studyclock_update_ui_seconds", "Time spent in update_ui."
+    )
+TICK_LATENESS = Summary(
+    "studyclock_tick_lateness_seconds",
+    "How late each tick fired compared to its 1 s schedule.",
+    )
+PERSIST_LATENCY = Summary(
+    "studyclock_persist_write_seconds", "Duration of persistence writes."
+    )
+PERSIST_BYTES = Counter(
+    "studyclock_persist_write_bytes_total",
+    "Approximate bytes handed to the settings store and history.",
+    )
+PHASE = Gauge(
+    "studyclock_phase", "1 for the current phase, 0 otherwise.",
+    label="phase",
+    )
+REMAINING = Gauge(
+    "studyclock_remaining_seconds", "Seconds left in the current phase."
+    )
+COMPLETED_UNITS = Gauge(
+    "studyclock_completed_units", "Focus units completed this session."
+    )
+FOCUS_WORK = Gauge(
+    "studyclock_focus_work_seconds", "Focus time worked (stats counter)."
+    )
+
+PHASES = (*KINDS, "finished")
+_last_phase = None
+
+
+def observe_state(s):
+    """Called on every state change: transitions + gauges."""
+    global _last_phase
+    phase = interval_kind(s) or "finished"
+    if phase != _last_phase:
+        if _last_phase is not None:
+            TRANSITIONS.inc(label_value=phase)
+        _last_phase = phase
+        for p in PHASES:
+            PHASE.set(int(p == phase), p)
+    REMAINING.set(
+        s.microbreak_remaining if s.microbreak_active else s.remaining
+        )
+    COMPLETED_UNITS.set(s.completed_units)
+    FOCUS_WORK.set(s.focus_work_sec)
+
+
+def render() -> str:
+    return "\n".join(m.render() for m in _metrics) + "\n"
+
+
+# ---------- Exporters ----------
+def _http_server(port: int):
+    # imported lazily: http.server is heavy for headless runs without it
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+class MetricsExporter:
+    """Serves /metrics on localhost and/or rewrites ``path`` every
+    ``every`` seconds, each on a daemon thread."""
+
+    def __init__(self, port: int = 0, path: str = "", every: float = 15.0):
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+        self.path = path
+        self.every = every
+        self._write_failed = False
+        if port:
+            try:
+                self._server = _http_server(port)
+            except OSError as e:
+                # e.g. port taken: the clock matters more than its metrics
+                print(f"StudyClock: metrics endpoint on port {port} "
+                      f"disabled: {e.strerror or e}", file=sys.stderr)
+            else:
+                self._spawn(self._server.serve_forever)
+        if path:
+            self._write()
+            self._spawn(self._write_loop)
+
+    def _spawn(self, target):
+        t = threading.Thread(
+            target=target, name="studyclock-metrics", daemon=True
+            )
+        t.start()
+        self._threads.append(t)
+
+    def _write(self):
+        from .persistence import atomic_write
+
+        try:
+            atomic_write(self.path, render().encode())
+        except OSError as e:
+            if not self._write_failed:  # once, not every ``every`` seconds
+                print(f"StudyClock: cannot write metrics to {self.path}: "
+                      f"{e.strerror or e}", file=sys.stderr)
+            self._write_failed = True
+        else:
+            self._write_failed = False
+
+    def _write_loop(self):
+        while not self._stop.wait(self.every):
+            self._write()
+
+    def close(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for t in self._threads:
+            t.join(1.0)
+        if self.path:
+            self._write()  # final values
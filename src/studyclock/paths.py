@@ -0,0 +1,52 @@
+"""Per-user locations, resolved without Qt (headless mode can't import it).
+
+The names follow what QSettings/QStandardPaths use for
+``QSettings("StudyClock", "StudyClockApp")`` so GUI and headless runs share
+the same files.
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+ORG = "StudyClock"
+APP = "StudyClockApp"
+
+
+def _home(*parts: str) -> str:
+    return os.path.join(os.path.expanduser("~"), *parts)
+
+
+def config_file() -> str:
+    """QSettings' native INI location on Linux/BSD."""
+    base = os.environ.get("XDG_CONFIG_HOME") or _home(".config")
+    return os.path.join(base, ORG, f"{APP}.conf")
+
+
+def plist_file() -> str:
+    """QSettings' native plist location on macOS."""
+    return _home(
+        "Library", "Preferences", f"com.{ORG.lower()}.{APP}.plist"
+        )
+
+
+def data_dir() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or _home("AppData", "Roaming")
+    elif sys.platform == "darwin":
+        base = _home("Library", "Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or _home(".local", "share")
+    path = os.path.join(base, ORG)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def runtime_dir() -> str:
+    """Private per-user dir for the instance socket and shared state."""
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if sys.platform in ("win32", "darwin") or not base:
+        return data_dir()
+    path = os.path.join(base, ORG)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
@@ -0,0 +1,422 @@
+"""Loading/saving ClockState from a QSettings-like key/value store.
+
+Anything with ``value(key, default)`` and ``setValue(key, value)`` works:
+the GUI passes a ``QSettings``, headless mode a :class:`NativeSettings`.
+"""
+from __future__ import annotations
+
+import configparser
+import os
+import sys
+import threading
+import time
+
+from . import metrics, paths
+from .history import IntervalRecorder
+from .logic import ClockState
+
+WRITE_INTERVAL_SEC = 30.0
+
+
+def load_state(qs, prefix: str = "") -> ClockState:
+    """``prefix`` selects a profile's key group (see profiles.py)."""
+    def value(key, default):
+        return qs.value(prefix + key, default)
+
+    # ---------- Persistent config ----------
+    focus_min = int(value("focus_min", 50))
+    break_min = int(value("break_min", 10))
+    micro_sec = int(value("micro_sec", 60))
+    goal = int(value("session_goal", 7))
+
+    # ---------- Runtime state ----------
+    mode = value("mode", "focus")
+    remaining = int(
+        value(
+            "remaining",
+            focus_min * 60 if mode == "focus" else break_min * 60
+            )
+        )
+
+    return ClockState(
+        focus_min=focus_min,
+        break_min=break_min,
+        micro_sec=micro_sec,
+        session_goal=goal,
+        mode=mode,
+        remaining=remaining,
+        completed_units=int(value("completed_units", 0)),
+        credited_units=int(value("credited_units", 0)),
+        microbreak_active=bool(int(value("microbreak_active", 0))),
+        microbreak_remaining=int(value("microbreak_remaining", 0)),
+        after_micro=value("after_micro", "") or "",
+        finished=bool(int(value("finished", 0))),
+        running=False,  # start paused
+        total_open_sec=int(value("total_open_sec", 0)),
+        paused_sec=int(value("paused_sec", 0)),
+        microbreak_sec=int(value("microbreak_sec", 0)),
+        focus_work_sec=int(value("focus_work_sec", 0)),
+        )
+
+
+def config_values(s: ClockState) -> dict:
+    return {
+        "focus_min": s.focus_min,
+        "break_min": s.break_min,
+        "micro_sec": s.micro_sec,
+        "session_goal": s.session_goal,
+        }
+
+
+def state_values(s: ClockState) -> dict:
+    return {
+        "mode": s.mode,
+        "remaining": s.remaining,
+        "completed_units": s.completed_units,
+        "credited_units": s.credited_units,
+        "finished": int(s.finished),
+        "microbreak_active": int(s.microbreak_active),
+        "microbreak_remaining": s.microbreak_remaining,
+        "after_micro": s.after_micro,
+        "total_open_sec": s.total_open_sec,
+        "paused_sec": s.paused_sec,
+        "microbreak_sec": s.microbreak_sec,
+        "focus_work_sec": s.focus_work_sec,
+        }
+
+
+def phase_key(s: ClockState) -> tuple:
+    """Changes exactly when the clock goes through a transition."""
+    return (
+        s.mode, s.microbreak_active, s.completed_units, s.finished,
+        s.running,
+        )
+
+
+def write_values(qs, values: dict):
+    for key, value in values.items():
+        qs.setValue(key, value)
+
+
+class PersistenceWriter:
+    """Debounced, off-thread persistence of ClockState.
+
+    ``notify`` is cheap and safe to call every tick: it snapshots the state
+    into a dict and wakes the worker. The worker writes at most once every
+    ``interval`` seconds, immediately on transitions, and only the keys
+    that changed. The store is created by ``open_store`` on the worker
+    thread (QSettings may be used from any thread, one object per thread).
+    ``after`` also runs there first, e.g. a previous writer's :meth:`join`,
+    so two writers never sync the same store at once.
+    """
+
+    def __init__(
+        self, open_store, interval: float = WRITE_INTERVAL_SEC,
+        open_history=None, prefix: str = "", after=None
+        ):
+        self._open_store = open_store
+        self._after = after
+        self.prefix = prefix
+        self._open_history = open_history
+        self.interval = interval
+        self._recorder = IntervalRecorder()
+        self._records = []
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._urgent = False
+        self._seq = 0
+        self._written_seq = 0
+        self._closed = False
+        self._last_phase = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="studyclock-persist", daemon=True
+            )
+        self._thread.start()
+
+    def notify(
+        self, s: ClockState, urgent: bool = False, final: bool = False,
+        extra: dict = None
+        ):
+        """``extra`` are additional keys (unprefixed) to write with it."""
+        values = {
+            self.prefix + k: v
+            for k, v in {**config_values(s), **state_values(s)}.items()
+            }
+        phase = phase_key(s)
+        if phase != self._last_phase:
+            self._last_phase = phase
+            urgent = True
+        if final:
+            closed = self._recorder.close(s)
+        else:
+            closed = self._recorder.observe(s)
+        with self._cond:
+            self._records.extend(closed)
+            if self._pending:
+                # keeps extras from a notify that wasn't written yet
+                values = {**self._pending, **values}
+            if extra:
+                values.update(extra)
+                urgent = True
+            self._pending = values
+            self._urgent = self._urgent or urgent
+            self._seq += 1
+            self._cond.notify()
+
+    def heartbeat(self, s: ClockState):
+        """Call once per second; see :meth:`IntervalRecorder.heartbeat`."""
+        closed = self._recorder.heartbeat(s)
+        if closed:
+            with self._cond:
+                self._records.extend(closed)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Writes whatever is pending now and waits until it's synced."""
+        with self._cond:
+            target = self._seq
+            self._urgent = True
+            self._cond.notify()
+            return self._cond.wait_for(
+                lambda: self._written_seq >= target or not
+                self._thread.is_alive(), timeout
+                ) and self._written_seq >= target
+
+    def close(
+        self, s: ClockState = None, timeout: float = 5.0, wait: bool = True
+        ):
+        """Flushes and stops the writer; ``s`` closes the open interval.
+
+        With ``wait=False`` the final write happens on the writer thread
+        and this returns at once (see :meth:`join`).
+        """
+        if s is not None:
+            self.notify(s, urgent=True, final=True)
+        with self._cond:
+            self._closed = True  # pending values are still written
+            self._cond.notify()
+        if wait:
+            self.join(timeout)
+
+    def join(self, timeout: float = 5.0):
+        self._thread.join(timeout)
+
+    def _run(self):
+        if self._after is not None:
+            self._after()
+        store = self._open_store()
+        history = None  # opened with the first closed interval
+        written = {}
+        last_write = float("-inf")
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending is not None or self._records:
+                        due = last_write + self.interval - time.monotonic()
+                        if self._urgent or self._closed or due <= 0:
+                            break
+                    elif self._closed:
+                        if history is not None:
+                            history.close()
+                        return
+                    else:
+                        due = None
+                    self._cond.wait(due)
+                values, self._pending = self._pending or {}, None
+                records, self._records = self._records, []
+                seq = self._seq
+                self._urgent = False
+
+            started = time.perf_counter()
+            changed = {
+                k: v for k, v in values.items() if written.get(k) != v
+                }
+            if changed:
+                try:
+                    write_values(store, changed)
+                    store.sync()
+                    written.update(changed)
+                except OSError:
+                    pass  # disk full / locked: retried with the next write
+            if records and self._open_history is not None:
+                import sqlite3
+
+                try:
+                    if history is None:
+                        history = self._open_history()
+                    history.append(records)
+                except sqlite3.Error:
+                    pass
+            if changed or records:
+                metrics.PERSIST_LATENCY.observe(
+                    time.perf_counter() - started
+                    )
+                metrics.PERSIST_BYTES.inc(
+                    sum(len(k) + len(str(v)) for k, v in changed.items())
+                    + 40 * len(records)  # ~one SQLite row each
+                    )
+            last_write = time.monotonic()
+
+            with self._cond:
+                self._written_seq = seq
+                self._cond.notify_all()
+
+
+class NativeSettings:
+    """Qt-free reader/writer for the GUI's QSettings native storage.
+
+    Registry on Windows, plist on macOS, INI file elsewhere. Values are
+    kept in memory and written back on :meth:`sync`. Keys may contain
+    groups (``"profiles/math/focus_min"``), mapped the way QSettings does
+    on each platform.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._dirty = False
+        if sys.platform == "win32":
+            self._load_registry()
+        elif sys.platform == "darwin":
+            self._load_plist()
+        else:
+            self._load_ini()
+
+    def value(self, key: str, default=None):
+        return self._values.get(key, default)
+
+    def setValue(self, key: str, value):
+        if self._values.get(key) != value:
+            self._values[key] = value
+            self._dirty = True
+
+    def sync(self):
+        if not self._dirty:
+            return
+        if sys.platform == "win32":
+            self._save_registry()
+        elif sys.platform == "darwin":
+            self._save_plist()
+        else:
+            self._save_ini()
+        self._dirty = False
+
+    # ---------- Windows ----------
+    _REG_PATH = rf"Software\{paths.ORG}\{paths.APP}"
+
+    def _load_registry(self, subkey: str = ""):
+        import winreg
+
+        path = self._REG_PATH + ("\\" + subkey if subkey else "")
+        prefix = subkey.replace("\\", "/") + "/" if subkey else ""
+        try:
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, path)
+        except OSError:
+            return
+        with key:
+            i = 0
+            while True:
+                try:
+                    name, value, _ = winreg.EnumValue(key, i)
+                except OSError:
+                    break
+                self._values[prefix + name] = value
+                i += 1
+            children = []
+            i = 0
+            while True:
+                try:
+                    children.append(winreg.EnumKey(key, i))
+                except OSError:
+                    break
+                i += 1
+        for child in children:
+            self._load_registry(f"{subkey}\\{child}" if subkey else child)
+
+    def _save_registry(self):
+        import winreg
+
+        for full_key, value in self._values.items():
+            group, _, name = full_key.rpartition("/")
+            path = self._REG_PATH
+            if group:
+                path += "\\" + group.replace("/", "\\")
+            if isinstance(value, bool):
+                value = int(value)
+            with winreg.CreateKey(winreg.HKEY_CURRENT_USER, path) as key:
+                if isinstance(value, int) and 0 <= value < 2 ** 32:
+                    winreg.SetValueEx(key, name, 0, winreg.REG_DWORD, value)
+                else:
+                    winreg.SetValueEx(key, name, 0, winreg.REG_SZ, str(value))
+
+    # ---------- macOS (QSettings maps "/" to "." in keys) ----------
+    def _load_plist(self):
+        import plistlib
+
+        try:
+            with open(paths.plist_file(), "rb") as f:
+                data = plistlib.load(f)
+        except (OSError, plistlib.InvalidFileException):
+            return
+        self._values = {k.replace(".", "/"): v for k, v in data.items()}
+
+    def _save_plist(self):
+        import plistlib
+
+        data = plistlib.dumps(
+            {k.replace("/", "."): v for k, v in self._values.items()},
+            fmt=plistlib.FMT_BINARY
+            )
+        atomic_write(paths.plist_file(), data)
+
+    # ---------- INI (Linux & co.) ----------
+    # QSettings stores "a/b/c" as key "b\c" in section [a]
+    def _parser(self) -> configparser.ConfigParser:
+        cp = configparser.ConfigParser(interpolation=None)
+        cp.optionxform = str  # keys are case-sensitive in QSettings
+        return cp
+
+    def _load_ini(self):
+        cp = self._parser()
+        cp.read(paths.config_file(), encoding="utf-8")
+        for section in cp.sections():
+            prefix = "" if section == "General" else section + "/"
+            for key, value in cp.items(section):
+                self._values[prefix + key.replace("\\", "/")] = value
+
+    def _save_ini(self):
+        cp = self._parser()
+        cp.read(paths.config_file(), encoding="utf-8")
+        for key, value in self._values.items():
+            section, _, rest = key.partition("/")
+            if not rest:
+                section, rest = "General", key
+            if not cp.has_section(section):
+                cp.add_section(section)
+            cp.set(section, rest.replace("/", "\\"), str(value))
+
+        lines = []
+        for section in cp.sections():
+            lines.append(f"[{section}]")
+            lines.extend(f"{k}={v}" for k, v in cp.items(section))
+            lines.append("")
+        atomic_write(paths.config_file(), "\n".join(lines).encode("utf-8"))
+
+
+def atomic_write(path: str, data: bytes):
+    folder = os.path.dirname(path)
+    if folder:  # a bare file name lives in the cwd
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,111 @@
+"""Named profiles, each with its own settings, ClockState and history.
+
+Layout in the settings store (QSettings or NativeSettings):
+
+* ``profile_names`` – "|"-separated list, ``current_profile`` – the active
+  one. Together with each profile's ``created``/``last_used`` keys this
+  is the index, the only part read at startup.
+* The ``default`` profile keeps the original top-level keys, so existing
+  installs carry on unchanged; other profiles live under
+  ``profiles/<name>/``.
+* Each profile has its own history file.
+
+A profile's ClockState is only read from the store when it is first
+selected and then kept, so switching back and forth costs nothing, and
+its history database is opened lazily by the persistence writer.
+"""
+from __future__ import annotations
+
+import os
+import re
+import time
+
+from . import paths
+from .history import RETENTION_DAYS, Compactor, HistoryStore, history_file
+from .logic import ClockState
+from .persistence import PersistenceWriter, load_state
+
+DEFAULT = "default"
+NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+
+
+def profile_prefix(name: str) -> str:
+    return "" if name == DEFAULT else f"profiles/{name}/"
+
+
+def profile_history_file(name: str) -> str:
+    if name == DEFAULT:
+        return history_file()
+    return os.path.join(paths.data_dir(), f"history-{name}.sqlite3")
+
+
+class ProfileManager:
+    def __init__(self, qs):
+        self.qs = qs
+        names = (qs.value("profile_names", "") or "").split("|")
+        self.index = {}
+        for name in [DEFAULT, *names]:
+            if name and name not in self.index and NAME_RE.match(name):
+                self.index[name] = {
+                    "created": float(self._meta(name, "created", 0)),
+                    "last_used": float(self._meta(name, "last_used", 0)),
+                    }
+        current = qs.value("current_profile", DEFAULT) or DEFAULT
+        self.current = current if current in self.index else DEFAULT
+        self._states = {}
+
+    def _meta(self, name: str, key: str, default):
+        return self.qs.value(profile_prefix(name) + key, default)
+
+    def names(self):
+        return list(self.index)
+
+    def state(self, name: str = None) -> ClockState:
+        """Loads the profile's state on first use, then keeps it."""
+        name = name or self.current
+        if name not in self._states:
+            self._states[name] = load_state(self.qs, profile_prefix(name))
+        return self._states[name]
+
+    def create(self, name: str):
+        if not NAME_RE.match(name):
+            raise ValueError(
+                "profile names may only use letters, digits, '-' and '_'"
+                )
+        if name not in self.index:
+            self.index[name] = {"created": time.time(), "last_used": 0.0}
+
+    def select(self, name: str) -> ClockState:
+        self.create(name)
+        self.current = name
+        self.index[name]["last_used"] = time.time()
+        return self.state(name)
+
+    # ---------- Per-profile workers ----------
+    def writer(
+        self, open_store, name: str = None, after=None
+        ) -> PersistenceWriter:
+        name = name or self.current
+        path = profile_history_file(name)
+        return PersistenceWriter(
+            open_store, open_history=lambda: HistoryStore(path),
+            prefix=profile_prefix(name), after=after,
+            )
+
+    def compactor(self, name: str = None) -> Compactor:
+        retention = self.qs.value("history_retention_days", RETENTION_DAYS)
+        return Compactor(
+            int(retention), path=profile_history_file(name or self.current)
+            )
+
+    def index_values(self) -> dict:
+        """Index keys to persist (through the persistence writer)."""
+        values = {
+            "profile_names": "|".join(n for n in self.index if n != DEFAULT),
+            "current_profile": self.current,
+            }
+        for name, meta in self.index.items():
+            prefix = profile_prefix(name)
+            values[prefix + "created"] = meta["created"]
+            values[prefix + "last_used"] = meta["last_used"]
+        return values
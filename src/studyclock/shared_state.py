@@ -0,0 +1,123 @@
+"""Live ClockState in a memory-mapped file, guarded by a seqlock.
+
+The running instance publishes its state once per change; readers (the
+``status`` command, widgets, scripts) map the same file read-only and copy
+it out without any IPC round-trip. The writer bumps the sequence number to
+odd before and to even after each update, and readers retry until they
+see the same even number on both sides of their copy.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+
+from . import paths
+from .logic import ClockState
+
+MODES = ("focus", "break", "lunch")
+F_RUNNING, F_FINISHED, F_MICRO = 1, 2, 4
+
+_SEQ = struct.Struct("<Q")
+_PAYLOAD = struct.Struct("<BBxxii10Id")
+SIZE = _SEQ.size + _PAYLOAD.size
+
+
+def state_file() -> str:
+    return os.path.join(paths.runtime_dir(), "state.bin")
+
+
+class SharedStateWriter:
+    def __init__(self, path: str = None):
+        self.path = path or state_file()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != SIZE:
+                os.ftruncate(fd, SIZE)
+            self._mm = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+        self._seq = _SEQ.unpack_from(self._mm, 0)[0] & ~1
+
+    def publish(self, s: ClockState, pid: int = None):
+        flags = (
+            (F_RUNNING if s.running else 0)
+            | (F_FINISHED if s.finished else 0)
+            | (F_MICRO if s.microbreak_active else 0)
+            )
+        mode = MODES.index(s.mode) if s.mode in MODES else 0
+
+        self._seq += 1  # odd: write in progress
+        _SEQ.pack_into(self._mm, 0, self._seq)
+        _PAYLOAD.pack_into(
+            self._mm, _SEQ.size, mode, flags, s.remaining,
+            s.microbreak_remaining, s.completed_units, s.session_goal,
+            s.focus_min, s.break_min, s.micro_sec, s.total_open_sec,
+            s.paused_sec, s.microbreak_sec, s.focus_work_sec,
+            os.getpid() if pid is None else pid, time.time(),
+            )
+        self._seq += 1  # even: stable
+        _SEQ.pack_into(self._mm, 0, self._seq)
+
+    def close(self, s: ClockState):
+        # pid 0 marks "no instance running"; the last state stays readable
+        self.publish(s, pid=0)
+        self._mm.close()
+
+
+class SharedStateReader:
+    def __init__(self, path: str = None):
+        self.path = path or state_file()
+        self._mm = None
+        self.pid = 0
+        self.updated_at = 0.0
+
+    def _map(self) -> bool:
+        if self._mm is not None:
+            return True
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < SIZE:
+                    return False
+                self._mm = mmap.mmap(
+                    f.fileno(), SIZE, access=mmap.ACCESS_READ
+                    )
+        except OSError:
+            return False
+        return True
+
+    def read(self, retries: int = 1000):
+        """Returns a consistent ClockState copy, or None if none exists."""
+        if not self._map():
+            return None
+        for _ in range(retries):
+            seq1 = _SEQ.unpack_from(self._mm, 0)[0]
+            if seq1 == 0:
+                return None  # created, nothing published yet
+            if seq1 & 1:
+                continue
+            fields = _PAYLOAD.unpack_from(self._mm, _SEQ.size)
+            if _SEQ.unpack_from(self._mm, 0)[0] == seq1:
+                break
+        else:
+            return None
+
+        (mode, flags, remaining, micro_remaining, units, goal, focus_min,
+         break_min, micro_sec, total_open, paused, micro, focus_work,
+         self.pid, self.updated_at) = fields
+        return ClockState(
+            focus_min=focus_min, break_min=break_min, micro_sec=micro_sec,
+            session_goal=goal, mode=MODES[mode], remaining=remaining,
+            completed_units=units, microbreak_active=bool(flags & F_MICRO),
+            microbreak_remaining=micro_remaining,
+            finished=bool(flags & F_FINISHED),
+            running=bool(flags & F_RUNNING), total_open_sec=total_open,
+            paused_sec=paused, microbreak_sec=micro,
+            focus_work_sec=focus_work,
+            )
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
@@ -1,23 +1,23 @@
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor, QIcon, QPainter, QPixmap
-from PySide6.QtWidgets import QApplication
-
+from functools import lru_cache
 
-def format_time_mmss(sec: int) -> str:
-    sec = max(0, int(sec))
-    m = sec // 60
-    s = sec % 60
-    return f"{m:02d}:{s:02d}"
+from PySide6.QtCore import QRectF, Qt
+from PySide6.QtGui import QColor, QFont, QIcon, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QApplication
 
+from .formatting import format_hm, format_time_mmss  # noqa: F401
 
-def format_hm(sec: int) -> str:
-    sec = max(0, int(sec))
-    h = sec // 3600
-    m = (sec % 3600) // 60
-    return f"{h:d}:{m:02d}"
+TRAY_ICON_SIZE = 32
+TRAY_COLORS = {
+    "focus": "#7CFC98",
+    "break": "#7CC7FF",
+    "lunch": "#7CC7FF",
+    "micro": "#FFD27C",
+    "paused": "#ff6b6b",
+    "finished": "#7CFC98",
+    }
 
 
-def beep():
+def beep(cue: str = ""):
     QApplication.beep()
 
 
@@ -39,3 +39,56 @@ def tint_icon(
     painter.end()
 
     return QIcon(tinted)
+
+
+@lru_cache(maxsize=256)
+def render_tray_icon(
+    phase: str, minutes: int, total_minutes: int, dpr: float = 1.0
+    ) -> QIcon:
+    """Phase-coloured ring with the remaining minutes in the middle.
+
+    Cached per (phase, minute, phase length, DPI), so a running clock only
+    paints a new pixmap once a minute.
+    """
+    size = TRAY_ICON_SIZE
+    color = QColor(TRAY_COLORS.get(phase, "#eeeeee"))
+
+    px = max(1, int(round(size * dpr)))
+    pm = QPixmap(px, px)
+    pm.setDevicePixelRatio(dpr)
+    pm.fill(Qt.transparent)
+
+    painter = QPainter(pm)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QColor("#111"))
+    painter.drawEllipse(QRectF(1, 1, size - 2, size - 2))
+
+    ring = QRectF(3, 3, size - 6, size - 6)
+    pen = QPen(QColor("#333"), 3)
+    painter.setPen(pen)
+    painter.setBrush(Qt.NoBrush)
+    painter.drawEllipse(ring)
+
+    if phase == "finished":
+        frac = 1.0
+    elif total_minutes > 0:
+        frac = min(max(minutes / total_minutes, 0.0), 1.0)
+    else:
+        frac = 0.0
+    if frac > 0:
+        pen.setColor(color)
+        painter.setPen(pen)
+        painter.drawArc(ring, 90 * 16, -int(round(360 * 16 * frac)))
+
+    text = "✓" if phase == "finished" else str(minutes)
+    font = QFont("Segoe UI")
+    font.setBold(True)
+    font.setPixelSize(14 if len(text) < 3 else 10)
+    painter.setFont(font)
+    painter.setPen(color)
+    painter.drawText(QRectF(0, 0, size, size), Qt.AlignCenter, text)
+    painter.end()
+
+    return QIcon(pm)
@@ -1,75 +1,69 @@
 from __future__ import annotations
 
-from PySide6.QtCore import QPoint, QSettings, QSize, Qt, QTimer
-from PySide6.QtGui import QAction, QFont, QIcon
+import time
+
+from PySide6.QtCore import (
+    QEvent, QPoint, QSettings, QSize, Qt, QTimer, Signal
+    )
+from PySide6.QtGui import (
+    QAction, QActionGroup, QFont, QIcon, QKeySequence, QShortcut
+    )
 from PySide6.QtWidgets import (
-    QApplication, QDialog, QHBoxLayout, QLabel, QMenu, QPushButton, QStyle,
-    QSystemTrayIcon, QVBoxLayout, QWidget
+    QApplication, QDialog, QHBoxLayout, QInputDialog, QLabel, QMenu,
+    QMessageBox, QPushButton, QStyle, QSystemTrayIcon, QVBoxLayout, QWidget
     )
 
-from .logic import ClockState, StudyClockLogic
+from . import metrics
+from .audio import CallbackSink, CueEngine, default_sink
+from .instance import PROFILE_COMMAND
+from .logic import StudyClockLogic
+from .profiles import DEFAULT as DEFAULT_PROFILE, ProfileManager
 from .settings_dialog import SettingsDialog
+from .shared_state import SharedStateWriter
 from .stats_dialog import \
     StatsDialog
-from .util import beep, format_hm, format_time_mmss, tint_icon
+from .util import (
+    beep, format_hm, format_time_mmss, render_tray_icon, tint_icon
+    )
+
+
+def default_store() -> QSettings:
+    return QSettings("StudyClock", "StudyClockApp")
 
 
 class StudyClockWindow(QWidget):
-    def __init__(self):
+    # commands forwarded by later launches (emitted from a worker thread)
+    command_received = Signal(str)
+
+    def __init__(self, profile: str = None, open_store=None):
         super().__init__()
 
         # ---------- Settings store ----------
-        self.qs = QSettings("StudyClock", "StudyClockApp")
-
-        # ---------- Load persistent config ----------
-        focus_min = int(self.qs.value("focus_min", 50))
-        break_min = int(self.qs.value("break_min", 10))
-        micro_sec = int(self.qs.value("micro_sec", 60))
-        goal = int(self.qs.value("session_goal", 7))
-
-        # ---------- Load runtime state ----------
-        mode = self.qs.value("mode", "focus")
-        remaining = int(
-            self.qs.value(
-                "remaining",
-                focus_min * 60 if mode == "focus" else break_min * 60
-                )
-            )
+        # a factory: the persistence thread opens its own store object
+        self.open_store = open_store or default_store
+        self.qs = self.open_store()
 
-        completed_units = int(self.qs.value("completed_units", 0))
-        microbreak_active = bool(int(self.qs.value("microbreak_active", 0)))
-        microbreak_remaining = int(self.qs.value("microbreak_remaining", 0))
-        after_micro = self.qs.value("after_micro", "")
-        finished = bool(int(self.qs.value("finished", 0)))
-
-        total_open_sec = int(self.qs.value("total_open_sec", 0))
-        paused_sec = int(self.qs.value("paused_sec", 0))
-        microbreak_sec = int(self.qs.value("microbreak_sec", 0))
-        focus_work_sec = int(self.qs.value("focus_work_sec", 0))
-
-        # ---------- Build state + logic ----------
-        state = ClockState(
-            focus_min=focus_min,
-            break_min=break_min,
-            micro_sec=micro_sec,
-            session_goal=goal,
-            mode=mode,
-            remaining=remaining,
-            completed_units=completed_units,
-            microbreak_active=microbreak_active,
-            microbreak_remaining=microbreak_remaining,
-            after_micro=after_micro,
-            finished=finished,
-            running=False,  # start paused
-            total_open_sec=total_open_sec,
-            paused_sec=paused_sec,
-            microbreak_sec=microbreak_sec,
-            focus_work_sec=focus_work_sec,
-            )
+        # ---------- Build state + logic (only the active profile) ----------
+        self.profiles = ProfileManager(self.qs)
+        state = self.profiles.select(profile or self.profiles.current)
+
+        # ---------- Audio cues (played off the GUI thread) ----------
+        self.audio = CueEngine(default_sink() or CallbackSink(beep))
+
+        # ---------- Persistence (debounced, off the GUI thread) ----------
+        self.persist = self.profiles.writer(self.open_store)
+        self.compactor = self.profiles.compactor()
+        QApplication.instance().aboutToQuit.connect(self.on_quit)
+
+        # live state for `studyclock status` and other readers
+        self.shared = SharedStateWriter()
 
         self.logic = StudyClockLogic(
-            state=state, on_change=self.update_ui, on_beep=beep
+            state=state, on_change=self.on_state_change,
+            on_beep=self.audio.play
             )
+        # opens the first history interval
+        self.persist.notify(state, extra=self.profiles.index_values())
 
         # ---------- Window flags / style ----------
         self.setWindowFlags(
@@ -98,7 +92,13 @@ class StudyClockWindow(QWidget):
                     """
             )
 
+        # ---------- Low-power rendering ----------
+        # While hidden/occluded only the tick timer and tray stay live.
+        self._ui_stale = True
+        self._watching_expose = False
+
         # ---------- Tray ----------
+        self._tray_key = None
         self.tray = QSystemTrayIcon(QIcon())
         menu = QMenu()
 
@@ -107,7 +107,13 @@ class StudyClockWindow(QWidget):
         restore_action.triggered.connect(self.showNormal)
         quit_action.triggered.connect(QApplication.quit)
 
+        self.profile_menu = QMenu("Profile")
+        # one group for the menu's lifetime; refills only swap its actions
+        self.profile_group = QActionGroup(self.profile_menu)
+        self.profile_menu.aboutToShow.connect(self.fill_profile_menu)
+
         menu.addAction(restore_action)
+        menu.addMenu(self.profile_menu)
         menu.addAction(quit_action)
 
         self.tray.setContextMenu(menu)
@@ -199,7 +205,7 @@ class StudyClockWindow(QWidget):
                 )
 
         self.play_pause_btn.setToolTip("Start / Pause")
-        self.rewind_btn.setToolTip("Back (Phase)")
+        self.rewind_btn.setToolTip("Back (Phase) – Ctrl+Z undoes")
         self.skip_btn.setToolTip("Skip (Phase)")
         self.reset_btn.setToolTip("Reset")
 
@@ -226,11 +232,12 @@ class StudyClockWindow(QWidget):
         # ---------- Timers ----------
         self.tick_timer = QTimer(self)
         self.tick_timer.setInterval(1000)
-        self.tick_timer.timeout.connect(self.logic.on_tick)
+        self.tick_timer.timeout.connect(self.on_tick_timer)
+        self._last_tick = None
 
         self.pause_count_timer = QTimer(self)
         self.pause_count_timer.setInterval(1000)
-        self.pause_count_timer.timeout.connect(self.logic.on_pause_count_tick)
+        self.pause_count_timer.timeout.connect(self.on_pause_count_timer)
         self.pause_count_timer.start()
 
         # ---------- Signals ----------
@@ -244,6 +251,11 @@ class StudyClockWindow(QWidget):
         self.rewind_btn.clicked.connect(self.logic.rewind_phase)
         self.skip_btn.clicked.connect(self.logic.skip_phase)
         self.reset_btn.clicked.connect(self.on_reset)
+        self.command_received.connect(self.handle_command)
+
+        # ---------- Undo / redo (skip, rewind, reset, lunch, settings) ----
+        QShortcut(QKeySequence.Undo, self, self.logic.undo)
+        QShortcut(QKeySequence.Redo, self, self.logic.redo)
 
         # ---------- Dragging ----------
         self._dragging = False
@@ -253,8 +265,8 @@ class StudyClockWindow(QWidget):
         self.resize(220, 220)
         self.update_layout_geometry()
 
-        # initial UI
-        self.update_ui()
+        # initial UI, shared state (`studyclock status`) and gauges
+        self.on_state_change()
 
     # ---------- Geometry ----------
     def update_layout_geometry(self):
@@ -265,7 +277,54 @@ class StudyClockWindow(QWidget):
         self.update_layout_geometry()
 
     # ---------- UI update ----------
+    def on_tick_timer(self):
+        now = time.monotonic()
+        if self._last_tick is not None:
+            metrics.TICK_LATENESS.observe(max(0.0, now - self._last_tick - 1))
+        self._last_tick = now
+        metrics.TICKS.inc()
+        self.logic.on_tick()
+
+    def on_pause_count_timer(self):
+        # runs every second, paused or not: doubles as the history heartbeat
+        self.logic.on_pause_count_tick()
+        self.persist.heartbeat(self.logic.s)
+
+    def on_state_change(self):
+        self.update_ui()
+        self.persist.notify(self.logic.s)
+        self.shared.publish(self.logic.s)
+        metrics.observe_state(self.logic.s)
+
     def update_ui(self):
+        started = time.perf_counter()
+        # timer + tray stay live; widgets are only touched while visible
+        self.sync_tick_timer()
+        self.update_tray()
+
+        if self.is_rendering():
+            self._ui_stale = False
+            self.render_ui()
+        else:
+            self._ui_stale = True
+        metrics.UPDATE_UI.observe(time.perf_counter() - started)
+
+    def is_rendering(self) -> bool:
+        if not self.isVisible() or self.isMinimized():
+            return False
+        handle = self.windowHandle()
+        return handle is None or handle.isExposed()
+
+    def sync_tick_timer(self):
+        s = self.logic.s
+        should_run = s.running and not s.finished
+        if should_run and not self.tick_timer.isActive():
+            self._last_tick = None  # lateness is measured from here
+            self.tick_timer.start()
+        elif not should_run and self.tick_timer.isActive():
+            self.tick_timer.stop()
+
+    def render_ui(self):
         s = self.logic.s
 
         # progress
@@ -286,8 +345,6 @@ class StudyClockWindow(QWidget):
             self.play_pause_btn.setIcon(
                 tint_icon(self.style().standardIcon(QStyle.SP_MediaPlay))
                 )
-            if self.tick_timer.isActive():
-                self.tick_timer.stop()
             return
 
         # microbreak display (optional)
@@ -300,8 +357,6 @@ class StudyClockWindow(QWidget):
             self.play_pause_btn.setIcon(
                 tint_icon(self.style().standardIcon(QStyle.SP_MediaPause))
                 )
-            if not self.tick_timer.isActive() and s.running:
-                self.tick_timer.start()
             return
 
         # timer text
@@ -315,8 +370,6 @@ class StudyClockWindow(QWidget):
             self.play_pause_btn.setIcon(
                 tint_icon(self.style().standardIcon(QStyle.SP_MediaPlay))
                 )
-            if self.tick_timer.isActive():
-                self.tick_timer.stop()
         else:
             if s.mode == "focus":
                 self.mode_label.setText("FOCUS")
@@ -332,8 +385,28 @@ class StudyClockWindow(QWidget):
             self.play_pause_btn.setIcon(
                 tint_icon(self.style().standardIcon(QStyle.SP_MediaPause))
                 )
-            if not self.tick_timer.isActive():
-                self.tick_timer.start()
+
+    # ---------- Visibility ----------
+    def showEvent(self, event):
+        super().showEvent(event)
+        handle = self.windowHandle()
+        if handle is not None and not self._watching_expose:
+            handle.installEventFilter(self)
+            self._watching_expose = True
+        if self._ui_stale:
+            self.update_ui()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange and self._ui_stale:
+            self.update_ui()
+
+    def eventFilter(self, watched, event):
+        # re-exposed after being fully covered: catch up once
+        if (event.type() == QEvent.Expose and self._ui_stale
+                and watched.isExposed()):
+            self.update_ui()
+        return super().eventFilter(watched, event)
 
     # ---------- Button handlers ----------
     def on_toggle_play_pause(self):
@@ -350,6 +423,76 @@ class StudyClockWindow(QWidget):
         self.logic.start_lunch_break()
         self.update_ui()
 
+    def handle_command(self, command: str):
+        if command == "show":
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+        elif command == "toggle":
+            self.on_toggle_play_pause()
+        elif command == "skip":
+            self.logic.skip_phase()
+        elif command == "rewind":
+            self.logic.rewind_phase()
+        elif command == "reset":
+            self.on_reset()
+        elif command == "lunch":
+            self.on_lunch()
+        elif command == "undo":
+            self.logic.undo()
+        elif command == "redo":
+            self.logic.redo()
+        elif command.startswith(PROFILE_COMMAND):
+            try:
+                self.switch_profile(command[len(PROFILE_COMMAND):])
+            except ValueError:
+                pass
+
+    # ---------- Profiles ----------
+    def switch_profile(self, name: str):
+        if name == self.profiles.current:
+            return
+        old = self.logic.s
+        self.profiles.create(name)  # validates the name
+        old.running = False
+        # both wind down on their own threads; the GUI never waits on disk
+        self.compactor.close(wait=False)
+        old_writer = self.persist
+        old_writer.close(old, wait=False)  # closes the old interval
+
+        state = self.profiles.select(name)
+        self.persist = self.profiles.writer(
+            self.open_store, after=old_writer.join
+            )
+        self.persist.notify(state, extra=self.profiles.index_values())
+        self.compactor = self.profiles.compactor()
+        self._tray_key = None
+        self.logic.replace_state(state)
+
+    def fill_profile_menu(self):
+        for action in self.profile_group.actions():
+            self.profile_group.removeAction(action)
+        self.profile_menu.clear()
+        for name in self.profiles.names():
+            action = self.profile_menu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(name == self.profiles.current)
+            action.setActionGroup(self.profile_group)
+            action.triggered.connect(
+                lambda _=False, n=name: self.switch_profile(n)
+                )
+        self.profile_menu.addSeparator()
+        self.profile_menu.addAction("New profile…", self.new_profile)
+
+    def new_profile(self):
+        name, ok = QInputDialog.getText(self, "New profile", "Name:")
+        if not ok or not name.strip():
+            return
+        try:
+            self.switch_profile(name.strip())
+        except ValueError as e:
+            QMessageBox.warning(self, "New profile", str(e))
+
     # ---------- Dialogs ----------
     def open_settings(self):
         s = self.logic.s
@@ -367,12 +510,8 @@ class StudyClockWindow(QWidget):
                 focus_min, break_min, micro_sec, goal, start_unit
                 )
 
-            # persist config immediately
-            self.qs.setValue("focus_min", self.logic.s.focus_min)
-            self.qs.setValue("break_min", self.logic.s.break_min)
-            self.qs.setValue("micro_sec", self.logic.s.micro_sec)
-            self.qs.setValue("session_goal", self.logic.s.session_goal)
-            self.qs.setValue("start_unit", int(start_unit))
+            # persist config right away (on the writer thread)
+            self.persist.notify(self.logic.s, urgent=True)
 
             self.update_ui()
 
@@ -388,6 +527,35 @@ class StudyClockWindow(QWidget):
         dlg.exec()
 
     # ---------- Tray ----------
+    def update_tray(self):
+        s = self.logic.s
+        if s.finished:
+            phase, remaining = "finished", 0
+        elif s.microbreak_active:
+            phase, remaining = "micro", s.microbreak_remaining
+        else:
+            phase = s.mode if s.running else "paused"
+            remaining = s.remaining
+
+        minutes = -(-max(0, remaining) // 60)
+        total_minutes = -(-self.logic.phase_total_sec() // 60)
+        key = (phase, minutes, total_minutes, self.devicePixelRatioF())
+
+        # only touch the tray when the visible value changes
+        if key == self._tray_key:
+            return
+        self._tray_key = key
+
+        self.tray.setIcon(render_tray_icon(*key))
+        if phase == "finished":
+            tip = "StudyClock – Finished"
+        else:
+            label = "Screen break" if phase == "micro" else phase.title()
+            tip = f"StudyClock – {label}: {minutes} min"
+        if self.profiles.current != DEFAULT_PROFILE:
+            tip += f" ({self.profiles.current})"
+        self.tray.setToolTip(tip)
+
     def on_tray_activated(self, reason):
         if reason == QSystemTrayIcon.Trigger:
             self.showNormal()
@@ -396,23 +564,15 @@ class StudyClockWindow(QWidget):
 
     # ---------- Close: persist state ----------
     def closeEvent(self, event):
-        s = self.logic.s
-        self.qs.setValue("mode", s.mode)
-        self.qs.setValue("remaining", s.remaining)
-        self.qs.setValue("completed_units", s.completed_units)
-        self.qs.setValue("finished", int(s.finished))
-
-        self.qs.setValue("microbreak_active", int(s.microbreak_active))
-        self.qs.setValue("microbreak_remaining", s.microbreak_remaining)
-        self.qs.setValue("after_micro", s.after_micro)
-
-        self.qs.setValue("total_open_sec", s.total_open_sec)
-        self.qs.setValue("paused_sec", s.paused_sec)
-        self.qs.setValue("microbreak_sec", s.microbreak_sec)
-        self.qs.setValue("focus_work_sec", s.focus_work_sec)
-
+        self.persist.notify(self.logic.s, urgent=True)
         event.accept()
 
+    def on_quit(self):
+        self.compactor.close()
+        self.persist.close(self.logic.s)
+        self.shared.close(self.logic.s)
+        self.audio.close()
+
     # ---------- Dragging ----------
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+    )
+
+
+@pytest.fixture(autouse=True)
+def user_dirs(tmp_path, monkeypatch):
+    """Points every per-user location at a temporary directory."""
+    for var in (
+            "HOME", "USERPROFILE", "APPDATA", "XDG_CONFIG_HOME",
+            "XDG_DATA_HOME", "XDG_RUNTIME_DIR"
+            ):
+        monkeypatch.setenv(var, str(tmp_path))
+    return tmp_path
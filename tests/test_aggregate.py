@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+from studyclock.aggregate import aggregate, main
+from studyclock.export import ROLLUP_FIELDS, export_rows, write_csv
+from studyclock.history import HistoryStore, Interval
+
+
+def export(tmp_path, name: str, granularity: str) -> str:
+    store = HistoryStore(str(tmp_path / f"{name}.sqlite3"))
+    for day in range(1, 11):  # 10 days with 25 min of focus each
+        start = datetime(2025, 3, day, 9).timestamp()
+        store.append([Interval(start, start + 1500, "focus", 1, 7)])
+    path = str(tmp_path / f"{name}.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        write_csv(export_rows(store, granularity=granularity),
+                  ROLLUP_FIELDS, f)
+    store.close()
+    return path
+
+
+def test_day_exports_are_aggregated(tmp_path):
+    paths = [export(tmp_path, "alice", "day"), export(tmp_path, "bob", "day")]
+    totals = aggregate(paths, str(tmp_path / "group.db"), workers=1)
+    assert (totals["users"], totals["days"]) == (2, 10)
+    assert totals["units"] == 20
+    assert totals["focus_sec"] == 2 * 10 * 1500
+
+
+@pytest.mark.parametrize("granularity", ["week", "month"])
+def test_coarser_rollups_are_rejected(tmp_path, capsys, granularity):
+    path = export(tmp_path, "alice", granularity)
+    store = tmp_path / "group.db"
+    assert main([path, "--store", str(store), "--workers", "1"]) == 2
+    assert granularity in capsys.readouterr().err
+    assert not store.exists()
@@ -0,0 +1,121 @@
+import io
+import subprocess
+import threading
+import time
+import wave
+
+import pytest
+
+from studyclock import audio
+
+
+class GateSink:
+    """Threaded sink that blocks in play() until released."""
+
+    threaded = True
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.played = []
+
+    def play(self, cue):
+        self.started.set()
+        self.release.wait(5.0)
+        self.played.append(cue)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_play_returns_at_once_with_a_slow_sink():
+    sink = GateSink()
+    engine = audio.CueEngine(sink)
+    start = time.monotonic()
+    engine.play("break")
+    assert time.monotonic() - start < 0.1
+    assert sink.started.wait(1.0)
+    sink.release.set()
+    assert wait_for(lambda: sink.played == ["break"])
+    engine.close()
+
+
+def test_full_queue_drops_cues():
+    sink = GateSink()
+    engine = audio.CueEngine(sink, max_pending=2)
+    engine.play("focus")
+    assert sink.started.wait(1.0)  # the worker holds the first cue
+    for cue in ("break", "microbreak", "focus", "break"):
+        engine.play(cue)
+    sink.release.set()
+    assert wait_for(lambda: len(sink.played) == 3)
+    engine.close()
+    assert sink.played == ["focus", "break", "microbreak"]
+
+
+@pytest.mark.parametrize("cue", sorted(audio.CUES))
+def test_render_cue_is_valid_wav(cue):
+    data = audio.render_cue(cue)
+    with wave.open(io.BytesIO(data)) as w:
+        assert w.getnchannels() == 1
+        assert w.getsampwidth() == 2
+        assert w.getframerate() == audio.SAMPLE_RATE
+        ms = sum(ms for _, ms in audio.CUES[cue])
+        assert w.getnframes() == pytest.approx(
+            audio.SAMPLE_RATE * ms / 1000, abs=len(audio.CUES[cue])
+            )
+
+
+def test_inline_sinks():
+    stream = io.StringIO()
+    engine = audio.CueEngine(audio.BellSink(stream))
+    engine.play("focus")
+    engine.play("break")
+    assert stream.getvalue() == "\a\a"
+    engine.close()
+    engine = audio.CueEngine()
+    assert isinstance(engine.sink, audio.NullSink)
+    engine.play("focus")  # no thread, no output
+    engine.close()
+
+
+def test_broken_inline_sink_is_ignored():
+    def fail():
+        raise RuntimeError("no speaker")
+
+    audio.CueEngine(audio.CallbackSink(fail)).play("focus")
+
+
+@pytest.mark.parametrize("player", ["pw-play", "paplay", "aplay"])
+def test_linux_players_get_the_clip_on_stdin(monkeypatch, player):
+    calls = []
+    monkeypatch.setattr(
+        subprocess, "run", lambda args, **kw: calls.append((args, kw))
+        )
+    sink = audio.WaveSink(f"/usr/bin/{player}")
+    sink.play("break")
+    (args, kw), = calls
+    assert args == [f"/usr/bin/{player}", *audio.STDIN_ARGS[player]]
+    assert kw["input"] == audio.render_cue("break")
+    assert not sink._files
+
+
+def test_afplay_gets_a_cached_file(monkeypatch, user_dirs):
+    calls = []
+    monkeypatch.setattr(
+        subprocess, "run", lambda args, **kw: calls.append((args, kw))
+        )
+    sink = audio.WaveSink("/usr/bin/afplay")
+    sink.play("microbreak")
+    sink.play("microbreak")
+    assert len(calls) == 2
+    args, kw = calls[0]
+    assert args[0] == "/usr/bin/afplay"
+    assert "input" not in kw
+    with open(args[1], "rb") as f:
+        assert f.read() == audio.render_cue("microbreak")
+    assert args[1].startswith(str(user_dirs))
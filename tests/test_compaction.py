@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from studyclock.export import export_rows
+from studyclock.history import HistoryStore, Interval, main as compact_main
+
+
+def at(day: int, hour: float) -> float:
+    return datetime(2025, 3, day).timestamp() + hour * 3600
+
+
+def test_compaction_keeps_the_totals(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.append([
+        Interval(at(1, 9), at(1, 10), "focus", 1, 7),
+        Interval(at(1, 10), at(1, 10.25), "paused", 0, 7),
+        Interval(at(1, 23.5), at(2, 0.5), "focus", 1, 7),
+        Interval(at(2, 0.5), at(2, 1), "break", 0, 7),
+        Interval(at(9, 9), at(9, 9.5), "focus", 0, 7),
+        ])
+    daily = list(export_rows(store, granularity="day"))
+    monthly = list(export_rows(store, granularity="month"))
+
+    while store.compact_step(at(5, 0), chunk=2):
+        pass
+    assert [iv.start for iv in store.iter_intervals()] == [at(9, 9)]
+    assert list(export_rows(store, granularity="day")) == daily
+    assert list(export_rows(store, granularity="month")) == monthly
+    store.close()
+
+
+def test_cli_retention_zero_keeps_everything(tmp_path, capsys):
+    path = str(tmp_path / "history.sqlite3")
+    store = HistoryStore(path)
+    store.append([Interval(at(1, 9), at(1, 10), "focus", 1, 7)])
+    store.close()
+
+    assert compact_main(["--db", path, "--retention-days", "0"]) == 0
+    assert "nothing compacted" in capsys.readouterr().out
+    store = HistoryStore(path)
+    assert [iv.start for iv in store.iter_intervals()] == [at(1, 9)]
+    store.close()
@@ -0,0 +1,68 @@
+import io
+import json
+from datetime import datetime
+
+from studyclock.export import (
+    RAW_FIELDS, ROLLUP_FIELDS, export_rows, write_csv, write_jsonl
+    )
+from studyclock.history import HistoryStore, Interval, day_start
+
+
+def at(day: int, hour: float) -> float:
+    return datetime(2025, 3, day).timestamp() + hour * 3600
+
+
+def make_store(tmp_path) -> HistoryStore:
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.append([
+        Interval(at(1, 9), at(1, 10), "focus", 1, 7),
+        Interval(at(1, 10), at(1, 10.25), "paused", 0, 7),
+        # crosses midnight: split across the two days
+        Interval(at(1, 23.5), at(2, 0.5), "focus", 1, 7),
+        Interval(at(2, 0.5), at(2, 1), "break", 0, 7),
+        Interval(at(9, 9), at(9, 9.5), "focus", 0, 7),
+        ])
+    return store
+
+
+def days(store, **kw):
+    return {
+        row["period"]: row
+        for row in export_rows(store, granularity="day", **kw)
+        }
+
+
+def test_day_rollup_splits_at_midnight(tmp_path):
+    store = make_store(tmp_path)
+    d = days(store)
+    assert d["2025-03-01"]["focus_sec"] == 3600 + 1800
+    assert d["2025-03-01"]["units"] == 1  # second unit ended on the 2nd
+    assert d["2025-03-02"]["focus_sec"] == 1800
+    assert d["2025-03-02"]["units"] == 1
+    assert d["2025-03-01"]["efficiency"] == 86  # 5400 / (5400 + 900)
+    assert d["2025-03-01"]["granularity"] == "day"
+
+
+def test_raw_export_is_clipped_to_the_range(tmp_path):
+    store = make_store(tmp_path)
+    since = day_start(datetime(2025, 3, 2).date())
+    until = day_start(datetime(2025, 3, 3).date())
+    rows = list(export_rows(store, since, until))
+    assert [(r["kind"], r["duration_sec"]) for r in rows] == [
+        ("focus", 1800), ("break", 1800)
+        ]
+
+
+def test_writers(tmp_path):
+    store = make_store(tmp_path)
+    out = io.StringIO()
+    write_csv(export_rows(store), RAW_FIELDS, out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == ",".join(RAW_FIELDS)
+    assert len(lines) == 1 + 5
+
+    out = io.StringIO()
+    write_jsonl(export_rows(store, granularity="week"), ROLLUP_FIELDS, out)
+    weeks = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [w["period"] for w in weeks] == ["2025-02-24", "2025-03-03"]
+    assert sum(w["units"] for w in weeks) == 2
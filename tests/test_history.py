@@ -0,0 +1,125 @@
+from studyclock.history import STALL_SEC, IntervalRecorder
+from studyclock.logic import ClockState, StudyClockLogic
+
+
+class Recorded:
+    """StudyClockLogic wired to an IntervalRecorder on a fake clock."""
+
+    def __init__(self, **state):
+        self.now = 1000.0
+        self.intervals = []
+        self.recorder = IntervalRecorder()
+        self.logic = StudyClockLogic(
+            ClockState(**state), self.observe, lambda cue: None
+            )
+        self.observe()
+
+    def observe(self):
+        self.intervals += self.recorder.observe(self.logic.s, self.now)
+
+    def wait(self, seconds: int):
+        for _ in range(seconds):
+            self.now += 1
+            self.logic.on_tick()
+            self.logic.on_pause_count_tick()
+            self.intervals += self.recorder.heartbeat(self.logic.s, self.now)
+
+    def close(self):
+        self.intervals += self.recorder.close(self.logic.s, self.now)
+        return self.intervals
+
+    def units(self) -> int:
+        return sum(iv.units for iv in self.close())
+
+
+def test_finished_unit_is_credited_once():
+    r = Recorded(focus_min=1, remaining=60, running=True)
+    r.wait(60)
+    assert r.logic.s.completed_units == 1
+    assert r.units() == 1
+    assert [iv.units for iv in r.intervals if iv.kind == "focus"] == [1]
+
+
+def test_settings_jump_is_not_work():
+    r = Recorded(running=True)
+    r.wait(1)
+    r.logic.apply_settings(50, 10, 60, 7, start_unit=5)
+    r.wait(1)
+    assert r.logic.s.completed_units == 4
+    assert r.units() == 0
+
+
+def test_rewind_takes_the_credit_back():
+    r = Recorded(running=True)
+    r.logic.skip_phase()  # focus -> break, 1 unit
+    r.wait(2)
+    r.logic.skip_phase()  # break -> focus
+    r.logic.rewind_phase()  # back into a break, unit 1 is open again
+    r.wait(2)
+    r.logic.skip_phase()
+    r.logic.skip_phase()  # unit 1 finished a second time
+    assert r.logic.s.completed_units == 1
+    assert r.units() == 1
+
+
+def test_rewind_of_a_jumped_unit_takes_nothing_back():
+    r = Recorded(running=True)
+    r.logic.skip_phase()
+    r.logic.skip_phase()
+    r.logic.apply_settings(50, 10, 60, 7, start_unit=4)
+    r.logic.rewind_phase()
+    assert r.logic.s.completed_units == 2
+    assert r.units() == 1
+
+
+def test_reset_keeps_recorded_units():
+    r = Recorded(running=True)
+    r.logic.skip_phase()
+    r.wait(1)
+    r.logic.reset_all()
+    assert r.units() == 1
+
+
+def test_stall_is_cut_at_the_last_heartbeat():
+    r = Recorded(running=True)
+    r.wait(10)
+    r.now += 3 * 3600  # suspended while running
+    r.wait(5)
+    focus = [iv for iv in r.close() if iv.kind == "focus"]
+    assert sum(iv.duration for iv in focus) == 11 + 4
+    assert all(iv.duration <= 11 for iv in focus)
+
+
+def test_paused_heartbeats_are_not_stalls():
+    r = Recorded()
+    r.wait(int(STALL_SEC) * 10)
+    paused = r.close()
+    assert [(iv.kind, iv.duration) for iv in paused] == [
+        ("paused", STALL_SEC * 10)
+        ]
+
+
+def test_undo_and_redo_keep_history_units_exact():
+    r = Recorded(running=True)
+    for _ in range(2):
+        r.logic.skip_phase()
+        r.wait(1)
+        r.logic.undo()
+        r.wait(1)
+    r.logic.skip_phase()
+    r.wait(1)
+    r.logic.undo()
+    r.logic.redo()
+    assert r.logic.s.completed_units == 1
+    assert r.units() == 1
+    assert [iv.units for iv in r.intervals if iv.units] == [
+        1, -1, 1, -1, 1, -1, 1
+        ]
+
+
+def test_states_passed_through_are_not_recorded():
+    r = Recorded()
+    r.now += 0.01
+    r.logic.start()  # the paused state lasted 10 ms
+    r.wait(3)
+    assert [iv.kind for iv in r.close()] == ["focus"]
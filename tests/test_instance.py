@@ -0,0 +1,67 @@
+import os
+import socket
+import sys
+
+import pytest
+
+from studyclock.instance import (
+    AlreadyRunning, InstanceServer, address, forward, send_command
+    )
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="exercises the AF_UNIX socket file"
+    )
+
+
+def test_second_server_does_not_steal_the_socket():
+    first = InstanceServer()
+    received = []
+    first.serve(received.append)
+    try:
+        with pytest.raises(AlreadyRunning):
+            InstanceServer()
+        assert send_command("skip")
+        assert received == ["skip"]
+    finally:
+        first.close()
+    assert not os.path.exists(address()[0])
+
+
+def test_stale_socket_is_reclaimed():
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(address()[0])
+    stale.close()
+    server = InstanceServer()
+    server.close()
+
+
+def test_forward_sends_profile_first():
+    server = InstanceServer()
+    received = []
+    server.serve(received.append)
+    try:
+        assert forward("toggle", "math")
+        assert received == ["profile:math", "toggle"]
+        assert forward()
+        assert received[-1] == "show"
+    finally:
+        server.close()
+
+
+def test_nothing_to_forward_to():
+    assert not forward("skip")
+
+
+def test_wire_format_matches_multiprocessing():
+    from multiprocessing.connection import Client
+
+    server = InstanceServer()
+    received = []
+    server.serve(received.append)
+    try:
+        with Client(address()[0], family="AF_UNIX") as conn:
+            conn.send_bytes(b"lunch")
+            assert conn.recv_bytes() == b"ok"
+        assert received == ["lunch"]
+    finally:
+        server.close()
@@ -0,0 +1,91 @@
+from studyclock.logic import UNDO_LIMIT, ClockState, StudyClockLogic
+
+
+def make_logic(**state):
+    changes = []
+    logic = StudyClockLogic(
+        ClockState(**state), lambda: changes.append(1), lambda cue: None
+        )
+    return logic, changes
+
+
+def test_undo_restores_the_exact_state():
+    logic, _ = make_logic(running=True)
+    before = (logic.s.mode, logic.s.remaining, logic.s.completed_units)
+    logic.skip_phase()
+    assert logic.s.mode == "break"
+    assert logic.undo()
+    assert (logic.s.mode, logic.s.remaining,
+            logic.s.completed_units) == before
+    assert logic.redo()
+    assert (logic.s.mode, logic.s.completed_units) == ("break", 1)
+
+
+def test_undo_keeps_time_elapsed_since_the_action():
+    logic, _ = make_logic(running=True)
+    for _ in range(5):
+        logic.on_tick()
+    logic.reset_all()
+    assert logic.s.total_open_sec == 0
+    logic.start()
+    for _ in range(3):
+        logic.on_tick()
+    logic.undo()
+    assert logic.s.total_open_sec == 5 + 3
+    assert logic.s.focus_work_sec == 5 + 3
+
+
+def test_new_action_clears_redo():
+    logic, _ = make_logic(running=True)
+    logic.skip_phase()
+    logic.undo()
+    logic.start_lunch_break()
+    assert not logic.can_redo()
+    assert not logic.redo()
+
+
+def test_noop_actions_are_not_recorded():
+    logic, _ = make_logic(finished=True)
+    logic.skip_phase()
+    assert not logic.can_undo()
+
+
+def test_undo_history_is_bounded():
+    logic, _ = make_logic(session_goal=10 ** 6)
+    for _ in range(UNDO_LIMIT + 50):
+        logic.skip_phase()
+    undone = 0
+    while logic.undo():
+        undone += 1
+    assert undone == UNDO_LIMIT
+
+
+def test_settings_undo_restores_units_and_lengths():
+    logic, _ = make_logic()
+    logic.apply_settings(25, 5, 30, 4, start_unit=3)
+    assert (logic.s.focus_min, logic.s.completed_units) == (25, 2)
+    logic.undo()
+    assert (logic.s.focus_min, logic.s.completed_units,
+            logic.s.session_goal) == (50, 0, 7)
+
+
+def test_replace_state_starts_a_fresh_undo_history():
+    logic, changes = make_logic(running=True)
+    logic.skip_phase()
+    logic.replace_state(ClockState())
+    assert not logic.can_undo()
+    assert changes
+
+
+def test_tick_transitions_are_an_undo_barrier():
+    logic, _ = make_logic(focus_min=1, remaining=60, running=True)
+    logic.skip_phase()  # unit 1 done, into the break
+    logic.skip_phase()  # back to focus
+    for _ in range(60):
+        logic.on_tick()  # unit 2 finishes on its own
+    assert logic.s.completed_units == 2
+    assert logic.s.history_units == 2
+    assert not logic.can_undo()
+    assert not logic.undo()
+    assert logic.s.completed_units == 2
+    assert logic.s.history_units == 2
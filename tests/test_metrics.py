@@ -0,0 +1,48 @@
+import socket
+
+from studyclock import metrics
+
+
+def test_busy_port_disables_only_the_endpoint(capsys, tmp_path):
+    path = tmp_path / "metrics.prom"
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        exporter = metrics.MetricsExporter(port, str(path))
+        exporter.close()
+    assert f"port {port}" in capsys.readouterr().err
+    assert "studyclock_ticks_total" in path.read_text()
+
+
+def test_large_counters_render_exactly(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", [])
+    counter = metrics.Counter("test_large_total", "Test counter.")
+    counter.inc(1234567)
+    counter.inc()
+    assert "test_large_total 1234568\n" in metrics.render() + "\n"
+    summary = metrics.Summary("test_latency_seconds", "Test summary.")
+    summary.observe(0.1)
+    summary.observe(1234567.25)
+    text = summary.render()
+    assert "test_latency_seconds_sum 1234567.35" in text
+    assert "test_latency_seconds_count 2" in text
+    assert metrics.format_value(float("inf")) == "+Inf"
+    assert metrics.format_value(True) == "1"
+
+
+def test_metrics_file_without_directory(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    exporter = metrics.MetricsExporter(path="metrics.prom")
+    exporter.close()
+    assert "studyclock_ticks_total" in (tmp_path / "metrics.prom").read_text()
+
+
+def test_failed_metrics_write_is_reported_once(capsys, tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    exporter = metrics.MetricsExporter(path=str(blocker / "metrics.prom"))
+    exporter._write()
+    exporter.close()
+    err = capsys.readouterr().err
+    assert err.count("cannot write metrics") == 1
@@ -0,0 +1,58 @@
+import plistlib
+import sys
+
+import pytest
+
+from studyclock import paths
+from studyclock.persistence import NativeSettings
+
+VALUES = {
+    "focus_min": "45",
+    "profile_names": "math",
+    "profiles/math/focus_min": "25",
+    "profiles/math/remaining": "1500",
+    }
+
+
+def fill(qs):
+    for key, value in VALUES.items():
+        qs.setValue(key, value)
+    qs.sync()
+
+
+@pytest.mark.skipif(sys.platform in ("win32", "darwin"),
+                    reason="INI is the native format elsewhere")
+def test_ini_groups_round_trip():
+    fill(NativeSettings())
+    with open(paths.config_file(), encoding="utf-8") as f:
+        text = f.read()
+    assert "[General]\nfocus_min=45\n" in text
+    assert "[profiles]\n" in text
+    assert "math\\focus_min=25\n" in text
+    reloaded = NativeSettings()
+    assert {k: reloaded.value(k) for k in VALUES} == VALUES
+
+
+@pytest.mark.skipif(sys.platform in ("win32", "darwin"),
+                    reason="INI is the native format elsewhere")
+def test_ini_matches_qsettings():
+    QtCore = pytest.importorskip("PySide6.QtCore")
+    fill(NativeSettings())
+    qs = QtCore.QSettings(paths.config_file(), QtCore.QSettings.IniFormat)
+    assert qs.value("profiles/math/focus_min") == "25"
+    assert qs.value("focus_min") == "45"
+    qs.setValue("profiles/physics/focus_min", 30)
+    qs.sync()
+    del qs
+    assert NativeSettings().value("profiles/physics/focus_min") == "30"
+
+
+def test_plist_keys_use_dots(monkeypatch):
+    monkeypatch.setattr(sys, "platform", "darwin")
+    fill(NativeSettings())
+    with open(paths.plist_file(), "rb") as f:
+        data = plistlib.load(f)
+    assert data["profiles.math.focus_min"] == "25"
+    assert "profiles/math/focus_min" not in data
+    reloaded = NativeSettings()
+    assert {k: reloaded.value(k) for k in VALUES} == VALUES
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from studyclock.logic import ClockState
+from studyclock.persistence import PersistenceWriter
+
+
+class SlowStore:
+    """QSettings stand-in whose sync takes a while."""
+
+    log = []
+
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.values = {}
+        SlowStore.log.append(("open", name))
+
+    def setValue(self, key, value):
+        self.values[key] = value
+
+    def sync(self):
+        time.sleep(self.delay)
+        SlowStore.log.append(("sync", self.name))
+
+
+def test_writes_only_changed_keys_with_prefix():
+    stores = []
+    writer = PersistenceWriter(
+        lambda: stores.append(SlowStore("a")) or stores[-1],
+        prefix="profiles/a/",
+        )
+    s = ClockState()
+    writer.notify(s)
+    assert writer.flush()
+    assert stores[0].values["profiles/a/focus_min"] == 50
+    stores[0].values.clear()
+    s.remaining -= 1
+    writer.notify(s, urgent=True)
+    writer.close()
+    assert stores[0].values == {"profiles/a/remaining": s.remaining}
+
+
+def test_close_without_waiting_hands_over_in_order():
+    SlowStore.log = []
+    old = PersistenceWriter(lambda: SlowStore("old", delay=0.3))
+    old.notify(ClockState())
+    assert old.flush()
+
+    started = time.perf_counter()
+    old.close(ClockState(remaining=1), wait=False)
+    new = PersistenceWriter(lambda: SlowStore("new"), after=old.join)
+    new.notify(ClockState(), extra={"current_profile": "new"})
+    assert time.perf_counter() - started < 0.1
+
+    new.close()
+    assert SlowStore.log == [
+        ("open", "old"), ("sync", "old"), ("sync", "old"),
+        ("open", "new"), ("sync", "new"),
+        ]
+    assert not any(t.name == "studyclock-persist"
+                   for t in threading.enumerate())
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+
+from studyclock import export, history
+from studyclock.headless import HeadlessClock
+from studyclock.persistence import NativeSettings
+from studyclock.profiles import ProfileManager, profile_prefix
+
+
+@pytest.mark.parametrize("main", [export.main, history.main])
+@pytest.mark.parametrize("name", ["../x", "a/b", "", "x" * 41])
+def test_tools_reject_bad_profile_names(main, name):
+    with pytest.raises(SystemExit) as exc:
+        main(["--profile", name])
+    assert exc.value.code == 2
+
+
+def test_profiles_load_lazily_and_keep_their_index():
+    qs = NativeSettings()
+    qs.setValue(profile_prefix("math") + "focus_min", 25)
+    qs.setValue("profile_names", "math")
+    profiles = ProfileManager(qs)
+    assert profiles.names() == ["default", "math"]
+    assert profiles._states == {}
+    assert profiles.select("math").focus_min == 25
+    assert list(profiles._states) == ["math"]
+    with pytest.raises(ValueError):
+        profiles.create("no spaces")
+    assert profiles.index_values()["current_profile"] == "math"
+
+
+def test_headless_switch_keeps_running_without_a_pause():
+    out = io.StringIO()
+    clock = HeadlessClock(out=out, sound="off")
+    try:
+        clock.logic.start()
+        clock.run_command("profile:math")
+        assert clock.profiles.current == "math"
+        assert clock.logic.s.running
+    finally:
+        clock.compactor.close()
+        clock.persist.close(clock.logic.s)
+        clock.shared.close(clock.logic.s)
+        clock.audio.close()
+    assert "PAUSED" not in out.getvalue()
@@ -0,0 +1,59 @@
+import threading
+
+from studyclock.logic import ClockState
+from studyclock.shared_state import (
+    SIZE, SharedStateReader, SharedStateWriter
+    )
+
+
+def test_missing_or_unpublished_file_reads_as_none(tmp_path):
+    path = str(tmp_path / "state.bin")
+    assert SharedStateReader(path).read() is None
+    with open(path, "wb") as f:
+        f.write(b"\0" * SIZE)
+    assert SharedStateReader(path).read() is None
+
+
+def test_round_trip_and_close(tmp_path):
+    path = str(tmp_path / "state.bin")
+    writer = SharedStateWriter(path)
+    s = ClockState(
+        mode="break", remaining=321, completed_units=3, session_goal=5,
+        running=True, focus_work_sec=1234,
+        )
+    writer.publish(s)
+    reader = SharedStateReader(path)
+    got = reader.read()
+    assert (got.mode, got.remaining, got.completed_units, got.session_goal,
+            got.running, got.focus_work_sec) == ("break", 321, 3, 5, True,
+                                                 1234)
+    assert reader.pid > 0
+
+    writer.close(s)
+    assert reader.read().remaining == 321
+    assert reader.pid == 0
+
+
+def test_reader_never_sees_a_torn_write(tmp_path):
+    path = str(tmp_path / "state.bin")
+    writer = SharedStateWriter(path)
+    writer.publish(ClockState(remaining=0, focus_work_sec=0))
+    stop = threading.Event()
+
+    def publish():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            writer.publish(ClockState(remaining=n, focus_work_sec=n))
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    reader = SharedStateReader(path)
+    try:
+        for _ in range(2000):
+            s = reader.read()
+            if s is not None:
+                assert s.remaining == s.focus_work_sec
+    finally:
+        stop.set()
+        thread.join()